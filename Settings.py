@@ -16,7 +16,7 @@ Core Components:
       Locates the correct project root to ensure `.env` discovery works
       regardless of where the module is executed.
 
-    - **Settings.parse_value()**
+    - **Settings.parse_value()** (memoized via `_parse_value`)
       Automatically parses environment variable strings into:
           * lists (comma-separated)
           * booleans
@@ -30,6 +30,10 @@ Core Components:
       and stores the results in the internal `_env` dictionary. This method
       is executed automatically once at import time.
 
+    - **Settings.refresh()**
+      Re-reads the `.env` file only when its modification time changed,
+      updating `_env` in place so existing `ENV` imports stay current.
+
     - **Public accessors**
       * `Settings.get(key, default)`
       * Attribute-style access (`Settings.KEY`)
@@ -42,7 +46,7 @@ Initialization:
     without requiring explicit initialization calls.
 
 Exports:
-    - `ENV`: a direct reference to the parsed environment dictionary, suitable
+    - `ENV`: a read-only view of the parsed environment dictionary, suitable
       for lightweight imports where class-based access is unnecessary.
 
 Intended Use:
@@ -50,13 +54,120 @@ Intended Use:
     configuration values in a safe, typed, and consistent manner.
 
 Dependencies:
-    - python-dotenv
+    - os
     - re
     - pathlib.Path
 """
+import os
 import re
+from functools import lru_cache
 from pathlib import Path
-from dotenv import dotenv_values
+from types import MappingProxyType
+
+# Patterns used by `_parse_value`, compiled once at import time
+_EMAIL_RE = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
+_DRIVE_RE = re.compile(r"^[A-Za-z]:\\")
+_FLOAT_START = frozenset("+-.0123456789")
+_VAR_RE = re.compile(r"\$\{([A-Za-z_]\w*)(?::-([^}]*))?\}")
+
+
+def _parse_dotenv(path: Path):
+    """
+    Minimal single-pass reader for KEY=VALUE .env files.
+
+    Blank lines and `#` comments are skipped, matching surrounding quotes are
+    removed, and `${VAR}` / `${VAR:-default}` references are expanded from keys
+    defined earlier in the file or, failing that, from `os.environ`. Values in
+    single quotes are taken literally. A missing file yields nothing.
+    :param path: Path to the .env file.
+    :return: Generator of (key, raw string value) pairs in file order.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return
+
+    seen = {}
+
+    def expand(match):
+        name, default = match.group(1), match.group(2)
+        value = seen.get(name, os.environ.get(name))
+        return value if value is not None else (default or "")
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, _, value = line.partition("=")
+        key, value = key.strip(), value.strip()
+        if len(value) >= 2 and value[0] == value[-1] == "'":
+            value = value[1:-1]
+        else:
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            # Most values hold no ${VAR} references; skip the regex pass for them
+            if "$" in value:
+                value = _VAR_RE.sub(expand, value)
+        seen[key] = value
+        yield key, value
+
+
+@lru_cache(maxsize=256)
+def _parse_value(value: str, root: str):
+    """
+    Convert strings to Python types automatically by detecting the following formats:
+        1. Parse comma-separated values -> list
+        2. Booleans -> bool
+        3. Integers -> number
+        4. Floats -> number
+        5. Filepaths -> string
+        6. Emails -> string
+        7. Strings -> string
+
+    Cheap string checks run first so that plain strings never reach the
+    float() try/except or the regex patterns. Results are memoized per
+    (value, root) pair, so repeated values are only parsed once.
+    :param value: Raw string value from the .env file.
+    :param root: Project root that relative paths are resolved against.
+    :return: Parsed value.
+    """
+    value = value.strip()
+
+    # 1. Parse comma-separated arrays (before type-coercing)
+    if "," in value:
+        return [v.strip() for v in value.split(",")]
+
+    # 2. Booleans
+    lower = value.lower()
+    if lower == "true":
+        return True
+    if lower == "false":
+        return False
+
+    # 3. Integers
+    digits = value[1:] if value[:1] == "-" else value
+    if digits.isdecimal():
+        return int(value)
+
+    # 4. Floats — only attempted when the value starts like a number
+    if value and value[0] in _FLOAT_START:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+
+    # 5. Paths — convert to absolute paths if path-like
+    # Detect forward/backslashes OR drive letters
+    if "/" in value or "\\" in value or _DRIVE_RE.match(value):
+        return str((Path(root) / value).resolve())
+
+    # 6. Email detection
+    if _EMAIL_RE.match(value):
+        return value
+
+    # Otherwise return raw string
+    return value
 
 
 class Settings:
@@ -70,8 +181,10 @@ class Settings:
     """
 
     _env = {}          # Stores parsed variables
+    _loaded = False    # Set once the .env file has been parsed
     ROOT = None        # Absolute project root path
     ENV_FILE = None    # The file actually loaded
+    _stamp = None      # (path, mtime) of the loaded file, used by `refresh`
 
     # Project Root Detection
     @staticmethod
@@ -79,80 +192,87 @@ class Settings:
         """
         Dynamically detect the root folder of the project by looking for
         either a .git folder or a .env file. Falls back to cwd.
+        Each directory is listed once instead of probing both names separately,
+        and unreadable directories are skipped rather than aborting the search.
         """
         current = Path(__file__).resolve()
-        for parent in [current] + list(current.parents):
-            if (parent / ".git").exists() or (parent / ".env").exists():
-                return parent
+        for parent in current.parents:
+            try:
+                with os.scandir(parent) as entries:
+                    if any(entry.name in (".git", ".env") for entry in entries):
+                        return parent
+            except OSError:
+                continue
         return Path.cwd()
 
     # Value Parser
     @staticmethod
     def parse_value(value: str):
         """
-        Convert strings to Python types automatically by detecting the following formats:
-            1. Parse comma-separated values -> list
-            2. Booleans -> bool
-            3. Integers -> number
-            4. Floats -> number
-            5. Emails -> string
-            6. Filepaths -> string
-            7. Strings -> string
+        Convert strings to Python types automatically (lists, booleans, numbers,
+        emails, paths and raw strings). See `_parse_value` for the detection order.
+        Lists are copied so callers never share the memoized object.
+        :param value: Raw string value from the .env file.
+        :return: Parsed value.
         """
-        value = value.strip()
-
-        # 1. Parse comma-separated arrays (before type-coercing)
-        if "," in value:
-            return [v.strip() for v in value.split(",")]
-
-        # 2. Booleans
-        lower = value.lower()
-        if lower == "true":
-            return True
-        if lower == "false":
-            return False
-
-        # 3. Integers
-        if re.fullmatch(r"-?\d+", value):
-            return int(value)
+        parsed = _parse_value(value, str(Settings.ROOT))
+        return list(parsed) if isinstance(parsed, list) else parsed
 
-        # 4. Floats
+    # Loading Environment Variables
+    @classmethod
+    def _env_file_stamp(cls):
+        """
+        Determine which .env file applies (.env.dev if present, else .env) and its modification time.
+        :return: (path, mtime) pair; mtime is None if the file does not exist.
+        """
+        dev_path = cls.ROOT / ".env.dev"
+        default_path = cls.ROOT / ".env"
+        path = dev_path if dev_path.exists() else default_path
         try:
-            return float(value)
-        except ValueError:
-            pass
-
-        # 5. Email detection
-        email_regex = r"^[\w\.-]+@[\w\.-]+\.\w+$"
-        if re.match(email_regex, value):
-            return value
+            return path, os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return path, None
 
-        # 6. Paths — convert to absolute paths if path-like
-        # Detect forward/backslashes OR drive letters
-        if "/" in value or "\\" in value or re.match(r"^[A-Za-z]:\\", value):
-            return str((Settings.ROOT / value).resolve())
+    @classmethod
+    def _read_env(cls):
+        """
+        Parse the current .env file into `cls._env`, replacing its contents in place so that
+        every `ENV` view handed out earlier sees the new values.
+        """
+        cls._stamp = cls._env_file_stamp()
+        cls.ENV_FILE = cls._stamp[0]
 
-        # Otherwise return raw string
-        return value
+        env = {key: cls.parse_value(raw_value) for key, raw_value in _parse_dotenv(cls.ENV_FILE)}
+        cls._env.clear()
+        cls._env.update(env)
 
-    # Loading Environment Variables
     @classmethod
     def _load_env(cls):
-        """Load and parse the .env file into class variable `cls._env`."""
-        cls.ROOT = cls._find_project_root()
-
-        # Determine which .env file to load
-        dev_path = cls.ROOT / ".env.dev"
-        default_path = cls.ROOT / ".env"
-
-        cls.ENV_FILE = dev_path if dev_path.exists() else default_path
+        """
+        Load and parse the .env file into class variable `cls._env`.
+        Subsequent calls are no-ops once the environment has been loaded.
+        """
+        if cls._loaded:
+            return
 
-        raw_vars = dotenv_values(cls.ENV_FILE)
+        cls.ROOT = cls._find_project_root()
+        cls._read_env()
+        cls._loaded = True
 
-        for key, raw_value in raw_vars.items():
-            parsed = cls.parse_value(raw_value)
-            cls._env[key] = parsed
-            # print()
+    @classmethod
+    def refresh(cls) -> bool:
+        """
+        Re-read the .env file if it was modified (or a different file now applies) since it was last loaded.
+        Unlike `importlib.reload(Settings)`, this re-executes no module code and keeps existing `ENV` imports valid.
+        :return: True if the file was re-read, False if nothing changed.
+        """
+        if not cls._loaded:
+            cls._load_env()
+            return True
+        if cls._env_file_stamp() == cls._stamp:
+            return False
+        cls._read_env()
+        return True
 
     # Public Accessors
     @classmethod
@@ -207,5 +327,5 @@ class Settings:
 # Initialize at import time (runs exactly once)
 Settings._load_env()
 
-# Export environment dictionary for easy importing
-ENV = Settings.__env__()
+# Export a read-only view of the environment dictionary for easy importing
+ENV = MappingProxyType(Settings.__env__())
@@ -16,11 +16,13 @@ Key Features
 
 - **Persistent caching**
   Results are stored in a JSON cache file on disk to minimize redundant API
-  requests. Cached entries are automatically reused on future runs.
+  requests. Cached entries are automatically reused on future runs. Writes
+  are batched rather than repeated after every lookup.
 
 - **Robust request handling**
   Includes retry logic, exponential backoff, and a delay between requests to
-  respect rate limits and mitigate transient network failures.
+  respect rate limits and mitigate transient network failures. All requests
+  share a single keep-alive `requests.Session`.
 
 - **Asynchronous file logging**
   Uses `AsyncFileLogger` to record events (initialization, cache loads/saves,
@@ -30,7 +32,9 @@ Key Features
 - **Bulk generation support**
   Capable of iterating over large sets of (city, state) pairs, commonly sourced
   from a pandas DataFrame, and producing a complete mapping of all resolved
-  coordinates.
+  coordinates. Lookups run on a small thread pool so network latency overlaps,
+  while a shared request schedule keeps the global request rate at one call per
+  `request_delay` seconds.
 
 Usage Overview
 --------------
@@ -52,26 +56,48 @@ Configuration
 - `request_delay`  : Base delay between API calls.
 - `max_retries`    : Number of retry attempts on request failure.
 - `backoff_factor` : Multiplier for exponential backoff between retries.
+- `flush_interval` : Number of new cache entries buffered before the cache
+                     file is rewritten.
+- `max_workers`    : Number of concurrent lookups in `generate_all_city_centers`.
 
 The cache can also be accessed directly via `get_cache()`.
 
 Dependencies
 ------------
 - `requests` for API calls
+- `orjson` (optional) for fast cache serialization, with a `json` fallback
 - `tqdm` for progress bars
 - `AsyncFileLogger` for non-blocking log writes
-- `Settings.ENV` for environment-configured API URL and user email
+- `Settings.ENV` for environment-configured API URL and user email; setting
+  `CITY_CENTER_DEBUG=True` additionally logs every individual lookup
 
 """
 
 import os
 import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 from Settings import ENV as PROPERTY
 from utils.devtools.multithread_logger import AsyncFileLogger  # Single async file logger
 
+# Prefer orjson for cache and response (de)serialization; fall back to the standard library
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
 
 class CityCentersClient:
     """
@@ -80,25 +106,47 @@ class CityCentersClient:
     """
 
     def __init__(self, cache_file="cache/city_centers_cache.json",
-                 request_delay=1.1, max_retries=3, backoff_factor=2):
+                 request_delay=1.1, max_retries=3, backoff_factor=2, flush_interval=50, max_workers=4):
         """
         Initializes a CityCentersClient instance.
         :param cache_file: a filepath to desired cache file
         :param request_delay: Base delay between API calls
         :param max_retries: Number of retry attempts on request failure.
         :param backoff_factor: Multiplier for exponential backoff between retries.
+        :param flush_interval: Number of new cache entries to buffer before writing the cache file.
+        :param max_workers: Number of concurrent lookups used by generate_all_city_centers.
         """
         self.cache_file = cache_file
         self.request_delay = request_delay
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
+        self.max_workers = max_workers
         self.cache = {}
+        self._lock = threading.RLock()  # Guards self.cache and cache file writes across workers
+
+        # Monotonic timestamp of the most recently scheduled request, shared by all workers
+        self._rate_lock = threading.Lock()
+        self._last_request = 0.0
+
+        # Cache writes are debounced: flushed every `flush_interval` new entries
+        self._dirty = 0
+        self._flush_interval = flush_interval
+
+        # Settings used on every request, resolved once
+        self._api_url = PROPERTY["NOMINATIM_API"]
+        self._user_agent = f"COMSC 230: Final Project ({PROPERTY['EMAIL']})"
+
+        # Persistent HTTP session so every lookup reuses one keep-alive connection
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = self._user_agent
+        self._session.mount(self._api_url, HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
 
         # Ensure cache directory exists
         os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
 
-        # Initialize async file logger
+        # Initialize async file logger; per-lookup messages are only emitted in debug mode
         self.logger = AsyncFileLogger()
+        self._log_debug = bool(PROPERTY.get("CITY_CENTER_DEBUG", False))
 
         # Load cache
         self._load_cache()
@@ -109,29 +157,75 @@ class CityCentersClient:
         Loads cached city center coordinates from the cache file if it exists, logging the outcome.
         """
         self.logger.info("Loading cache...")
-        if os.path.exists(self.cache_file):
-            with open(self.cache_file, "r", encoding="utf-8") as f:
-                self.cache = json.load(f)
-            if len(self.cache) == 0:
-                self.logger.info("Cache is empty.")
-            else:
-                self.logger.info(f"Cache loaded successfully: {len(self.cache)} entries.")
-        else:
+        try:
+            with open(self.cache_file, "rb") as f:
+                self.cache = _json_loads(f.read())
+        except FileNotFoundError:
             self.logger.info("Cache not found.")
+            return
+        if len(self.cache) == 0:
+            self.logger.info("Cache is empty.")
+        else:
+            self.logger.info(f"Cache loaded successfully: {len(self.cache)} entries.")
 
     def _save_cache(self):
         """
-        Saves the current in-memory cache to the cache file, logging success.
+        Saves the current in-memory cache to the cache file, logging success. The file is written to a temporary
+        path and renamed into place so an interrupted write never leaves a truncated cache.
         """
         self.logger.info("Saving to cache...")
-        with open(self.cache_file, "w", encoding="utf-8") as f:
-            json.dump(self.cache, f)
+        with self._lock:
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(_json_dumps(self.cache))
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = 0
         self.logger.info("Cache saved successfully")
 
+    def _store(self, key, value):
+        """
+        Stores a lookup result and flushes the cache file once `flush_interval` entries are pending.
+        :param key: "City, State" cache key.
+        :param value: Dictionary with 'lat' and 'lon', or None.
+        """
+        with self._lock:
+            self.cache[key] = value
+            self._dirty += 1
+            if self._dirty >= self._flush_interval:
+                self._save_cache()
+
+    def _wait_for_slot(self):
+        """
+        Reserves the next request slot and sleeps only for whatever remains of `request_delay` since the
+        previously reserved one. If that interval has already elapsed (e.g. spent waiting on the network),
+        the request goes out immediately.
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._last_request + self.request_delay)
+            self._last_request = slot
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _fetch_network(self, city: str, state: str) -> list:
+        """
+        Issues a single Nominatim search request without any rate limiting or retries.
+        :param city: Name of the city.
+        :param state: Two-letter state abbreviation.
+        :return: Decoded JSON response (a list of matches, possibly empty).
+        :raises requests.RequestException: If the request fails.
+        :raises ValueError: If the response body is not valid JSON (orjson's and json's decode errors both subclass it).
+        """
+        params = {"q": f"{city}, {state}, USA", "format": "json", "limit": 1, "addressdetails": 0}
+        response = self._session.get(self._api_url, params=params, timeout=20)
+        response.raise_for_status()
+        return _json_loads(response.content) if response.content else []
+
     def fetch_city_center(self, city: str, state: str) -> dict | None:
         """
         Fetches latitude and longitude for a given city and state, using a cache to avoid redundant API calls.
         Updates the cache and returns a dictionary with 'lat' and 'lon', or None if unavailable.
+        New entries are written to the cache file in batches of `flush_interval`.
         :param city: Name of the city.
         :param state: Two-letter state abbreviation.
         :return: Dictionary with 'lat' and 'lon' or None.
@@ -139,52 +233,68 @@ class CityCentersClient:
         key = f"{city}, {state}"
         if key in self.cache:
             return self.cache[key]
+        return self._resolve(key, city, state)
 
-        params = {"q": f"{city}, {state}, USA", "format": "json", "limit": 1, "addressdetails": 0}
-        headers = {"User-Agent": f"COMSC 230: Final Project ({PROPERTY['EMAIL']})"}
-
+    def _resolve(self, key: str, city: str, state: str) -> dict | None:
+        """
+        Fetches coordinates for a city known to be missing from the cache, retrying with exponential backoff,
+        and stores the result under `key`.
+        :param key: "City, State" cache key.
+        :param city: Name of the city.
+        :param state: Two-letter state abbreviation.
+        :return: Dictionary with 'lat' and 'lon' or None.
+        """
         data = {}
         for attempt in range(1, self.max_retries + 1):
             try:
-                time.sleep(self.request_delay)
-                response = requests.get(PROPERTY["NOMINATIM_API"], params=params, headers=headers, timeout=20)
-                response.raise_for_status()
-                data = response.json()
+                self._wait_for_slot()
+                data = self._fetch_network(city, state)
                 break
-            except requests.RequestException:
+            except (requests.RequestException, ValueError):
+                # A malformed or truncated body is retried like a failed request
                 if attempt < self.max_retries:
                     backoff_time = self.request_delay * (self.backoff_factor ** (attempt - 1))
-                    self.logger.info(f"Retrying {key} in {backoff_time:.1f}s (attempt {attempt})")
+                    if self._log_debug:
+                        self.logger.info(f"Retrying {key} in {backoff_time:.1f}s (attempt {attempt})")
                     time.sleep(backoff_time)
                 else:
                     self.logger.error(f"Failed to fetch city center for {key} after {self.max_retries} attempts")
-                    self.cache[key] = None
-                    self._save_cache()
+                    self._store(key, None)
                     return None
 
-        if not data:
-            self.cache[key] = None
-        else:
-            coordinates = {"lat": float(data[0]["lat"]), "lon": float(data[0]["lon"])}
-            self.cache[key] = coordinates
-        self.logger.info(f"Caching city center coordinates: {key} -> {self.cache[key]}")
-        self._save_cache()
-        self.logger.info(f"Cache saved successfully: {key} -> {self.cache[key]}")
-        return self.cache[key]
+        coordinates = {"lat": float(data[0]["lat"]), "lon": float(data[0]["lon"])} if data else None
+        if self._log_debug:
+            self.logger.info(f"Caching city center coordinates: {key} -> {coordinates}")
+        self._store(key, coordinates)
+        return coordinates
 
     def generate_all_city_centers(self, df):
         """
-        Iterates over unique city-state pairs in a DataFrame, fetching and caching coordinates for each city.
-        Returns a dictionary mapping "City, State" to coordinates.
+        Iterates over unique city-state pairs in a DataFrame, fetching and caching coordinates for each city
+        on a thread pool of `max_workers` lookups. Returns a dictionary mapping "City, State" to coordinates.
+        Cached cities are resolved up front; only cache misses enter the fetch loop. The cache file is written
+        once at the end, including when the loop is interrupted.
         :param df: DataFrame with unique city-state pairs.
         :return: Dictionary mapping "City, State" to coordinates.
         """
-        centers = {}
-        unique_pairs = df[['cityname', 'state']].drop_duplicates().values
+        pairs = df[['cityname', 'state']].drop_duplicates()
+        keys = (pairs['cityname'].astype(str) + ', ' + pairs['state'].astype(str)).tolist()
+
+        # Partition into cache hits and misses
+        centers = {key: self.cache[key] for key in keys if key in self.cache}
+        misses = [(key, city, state) for key, (city, state) in zip(keys, pairs.values) if key not in centers]
+        self.logger.info(f"{len(centers)} city centers cached, {len(misses)} to fetch.")
 
-        # tqdm loop with async logging
-        for city, state in tqdm(unique_pairs, desc="Fetching city centers", colour="green"):
-            centers[f"{city}, {state}"] = self.fetch_city_center(city, state)
+        # Results arrive in submission order, so tqdm advances as each lookup completes
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            results = executor.map(lambda miss: self._resolve(*miss), misses)
+            for (key, _, _), coordinates in tqdm(zip(misses, results), total=len(misses),
+                                                 desc="Fetching city centers", colour="green"):
+                centers[key] = coordinates
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._save_cache()
         self.logger.info(f"Fetched landmarks for {len(centers)} cities successfully.")
         return centers
 
@@ -30,29 +30,40 @@ Dependencies:
     - Settings.ENV
 """
 
+from operator import itemgetter
 from api.city_center import CityCentersClient
 from api.landmarks import LandmarksClient
 from Settings import ENV as PROPERTY
 
+# Settings consumed by `create_clients`, fetched in one C-level call
+_CLIENT_SETTINGS = itemgetter(
+    "CITY_CENTER_CACHE_FILE", "NOMINATIM_REQUEST_DELAY", "NOMINATIM_MAX_RETRIES", "NOMINATIM_BACKOFF_FACTOR",
+    "LANDMARKS_CACHE_FILE", "OVERPASS_ENDPOINTS", "OVERPASS_REQUEST_DELAY", "OVERPASS_MAX_RETRIES",
+    "OVERPASS_BACKOFF_FACTOR",
+)
+
 
 def create_clients():
     """
     Creates API clients for Nominatim and Overpass
     :return: Separate API clients for Nominatim and Overpass (in that order)
     """
+    (cc_cache, cc_delay, cc_retries, cc_backoff,
+     lm_cache, lm_endpoints, lm_delay, lm_retries, lm_backoff) = _CLIENT_SETTINGS(PROPERTY)
+
     city_client = CityCentersClient(
-        cache_file=PROPERTY["CITY_CENTER_CACHE_FILE"],
-        request_delay=PROPERTY["NOMINATIM_REQUEST_DELAY"],
-        max_retries=PROPERTY["NOMINATIM_MAX_RETRIES"],
-        backoff_factor=PROPERTY["NOMINATIM_BACKOFF_FACTOR"]
+        cache_file=cc_cache,
+        request_delay=cc_delay,
+        max_retries=cc_retries,
+        backoff_factor=cc_backoff
     )
 
     landmark_client = LandmarksClient(
-        cache_file=PROPERTY["LANDMARKS_CACHE_FILE"],
-        endpoints=PROPERTY["OVERPASS_ENDPOINTS"],
-        request_delay=PROPERTY["OVERPASS_REQUEST_DELAY"],
-        max_retries=PROPERTY["OVERPASS_MAX_RETRIES"],
-        backoff_factor=PROPERTY["OVERPASS_BACKOFF_FACTOR"],
+        cache_file=lm_cache,
+        endpoints=lm_endpoints,
+        request_delay=lm_delay,
+        max_retries=lm_retries,
+        backoff_factor=lm_backoff,
     )
 
     return city_client, landmark_client
\ No newline at end of file
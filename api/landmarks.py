@@ -17,7 +17,12 @@ associated with tags such as **tourism**, **amenity**, **historic**, and
 
 The class supports persistent caching, rate limiting between requests,
 exponential backoff retry logic, and the ability to distribute POST requests
-across multiple Overpass API endpoints.
+across multiple Overpass API endpoints. Bulk fetches run one worker thread per
+endpoint, each rate limited independently. All requests share a single
+keep-alive client, so TLS handshakes are not repeated per request. When HTTPX
+and its HTTP/2 extra are installed, an `httpx.Client(http2=True)` is used so
+concurrent queries to one mirror are multiplexed over a single connection;
+otherwise a pooled `requests.Session` is used.
 
 Key Features
 ------------
@@ -25,18 +30,26 @@ Key Features
   Automatically constructs and submits Overpass QL queries to retrieve
   point-of-interest elements for a given city/state region.
 
-- **Persistent JSON caching**
-  Results are written to a JSON cache file, reducing redundant calls and enabling
-  fast repeated runs. Cached results are automatically reused whenever possible.
+- **Persistent SQLite caching**
+  Results are stored in an SQLite database next to the configured cache file
+  (same name, `.sqlite` suffix), reducing redundant calls and enabling fast
+  repeated runs. Each entry is a single keyed row, so a lookup or a new result
+  touches only its own row; nothing is deserialized or rewritten up front. The
+  database runs in WAL mode, and `compact()` checkpoints the log. Failed
+  lookups are stored as `null` and fetched again on the next run, so they are
+  never confused with cities that have no landmarks (`[]`). A JSON cache file
+  left by earlier versions is imported on first use.
 
 - **Rate-limit enforcement**
   Ensures that API calls never occur more frequently than `request_delay`
   seconds, even across retries. This prevents needless 429/timeout errors when
-  working with strict Overpass servers.
+  working with strict Overpass servers. Each endpoint has its own thread-safe
+  `TokenBucket`, which can optionally allow short bursts (`burst`).
 
 - **Robust retry and backoff**
   Implements multiple retry attempts with exponential backoff, improving
-  stability against intermittent server failures.
+  stability against intermittent server failures. Each retry moves on to the
+  next endpoint, so a mirror that is down does not exhaust a city's attempts.
 
 - **Asynchronous file logging**
   Uses `AsyncFileLogger` to produce non-blocking, thread-safe logs without
@@ -50,10 +63,13 @@ Configuration
 -------------
 `LandmarksClient` supports flexible initialization:
 
-- `cache_file`     : Path to the JSON cache file. Automatically created if needed.
+- `cache_file`     : Path to the cache file; the SQLite store uses the same name
+                      with a `.sqlite` suffix. Automatically created if needed.
 - `endpoints`      : A list of Overpass API endpoint URLs to randomly distribute
                       requests across.
 - `request_delay`  : Minimum delay between requests (rate-limit control).
+- `burst`          : Number of requests per endpoint allowed back to back
+                      before `request_delay` pacing applies.
 - `max_retries`    : Number of retry attempts per request.
 - `backoff_factor` : Exponential multiplier applied to retry delays.
 
@@ -72,7 +88,11 @@ Batch usage:
 Dependencies
 ------------
 - `requests` for HTTP operations
+- `httpx[http2]` (optional) for multiplexed HTTP/2 requests
+- `sqlite3` for the persistent cache
+- `orjson` (optional) for fast cache serialization, with a `json` fallback
 - `tqdm` for progress displays
+- `TokenBucket` for per-endpoint rate limiting
 - `AsyncFileLogger` for concurrent, non-blocking log output
 - `Settings.ENV` for user-agent metadata and environment configuration
 
@@ -81,18 +101,73 @@ import os
 import json
 import time
 import random
+import sqlite3
+import functools
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from tqdm import tqdm
+from api.rate_limit import TokenBucket
 from Settings import ENV as PROPERTY
 from utils.devtools.multithread_logger import AsyncFileLogger
 
+# Prefer orjson for cache (de)serialization; fall back to the standard library
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+# Shared stand-in for elements without tags; never mutated
+_EMPTY_TAGS = {}
+
+# Overpass QL query for a city's points of interest, formatted with (state, city)
+_QUERY_TEMPLATE = """
+[out:json][timeout:25];
+area["ISO3166-2"="US-%s"]->.stateArea;
+area["name"="%s"]["boundary"="administrative"](area.stateArea)->.cityArea;
+(
+  node["tourism"](area.cityArea);
+  node["amenity"](area.cityArea);
+  node["historic"](area.cityArea);
+  node["leisure"](area.cityArea);
+);
+out center;
+"""
+
+
+def _ql_escape(value: str) -> str:
+    """
+    Escapes a value for use inside a double-quoted Overpass QL string literal.
+    :param value: Raw value, e.g. a city name.
+    :return: Escaped value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+# Prefer HTTPX over HTTP/2 (requires the h2 extra) for Overpass requests; fall back to requests
+try:
+    import h2  # noqa: F401
+    import httpx
+except ImportError:
+    httpx = None
+
 
 class LandmarksClient:
     """
         Fetches and caches landmark data for U.S. cities using the Overpass API.
 
         Handles rate limiting, retries with exponential backoff, and persistent
-        JSON caching to support large batch queries. Uses an asynchronous logger
+        SQLite caching to support large batch queries. Uses an asynchronous logger
         to record events without blocking tqdm progress bars.
     """
     def __init__(
@@ -102,6 +177,7 @@ class LandmarksClient:
         request_delay=1.1,
         max_retries=3,
         backoff_factor=2,
+        burst=1,
     ):
         """
         Initializes the client, sets up caching, asynchronous logging, and rate-limiting.
@@ -111,6 +187,7 @@ class LandmarksClient:
         :param request_delay: Minimum delay between requests (rate-limit control).
         :param max_retries: Number of retry attempts per request.
         :param backoff_factor: Exponential multiplier applied to retry delays.
+        :param burst: Number of requests per endpoint allowed back to back before pacing applies.
         """
         self.cache_file = cache_file
         self.endpoints = endpoints
@@ -119,96 +196,175 @@ class LandmarksClient:
         self.backoff_factor = backoff_factor
 
         # Ensure cache directory exists
-        self.cache = {}
         os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
 
         # Initialize async file logger
         self.logger = AsyncFileLogger()
 
-        # Load cache
-        self._load_cache()
+        # SQLite key-value store ("City, State" -> encoded landmark list), shared by worker threads
+        self._db_file = os.path.splitext(self.cache_file)[0] + ".sqlite"
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(self._db_file, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache (k TEXT PRIMARY KEY, v BLOB)")
+
+        # Import the JSON cache written by earlier versions
+        self._migrate_legacy_cache()
+
+        # Persistent HTTP client: multiplexed HTTP/2 when available, else one connection pool per endpoint host
+        if httpx is not None:
+            self._session = httpx.Client(
+                http2=True,
+                timeout=40.0,
+                limits=httpx.Limits(max_keepalive_connections=max(1, len(endpoints or [])), max_connections=32),
+            )
+        else:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max(1, len(endpoints or [])), pool_maxsize=16, max_retries=0)
+            for endpoint in endpoints or []:
+                self._session.mount(endpoint, adapter)
+
+        # Request headers, built once
+        self._headers = {"User-Agent": f"COMSC 230: Final Project ({PROPERTY["EMAIL"]})"}
+
+        # In-memory memo of store hits, keyed by (city, state)
+        self._mem_cache = functools.lru_cache(maxsize=None)(self._lookup_cached)
 
-        # Track last request time for enforced rate limit
-        self._last_request_time = 0
+        # One token bucket per endpoint for enforced rate limits; endpoints outside `endpoints` get one on first use
+        self._burst = burst
+        self._buckets_lock = threading.Lock()
+        self._buckets = {endpoint: TokenBucket(1 / request_delay, burst) for endpoint in endpoints or []}
         self.logger.info("LandmarksClient initialized")
 
-    def _load_cache(self):
+    def _migrate_legacy_cache(self):
         """
-        Loads the cache from the cache file if it exists.
-        Logs the number of entries or notes if the cache is empty or missing.
+        Imports the plain JSON cache file written by earlier versions into the SQLite store, then moves it aside so
+        the import runs only once.
         """
-        self.logger.info("Loading cache...")
-        if os.path.exists(self.cache_file):
-            with open(self.cache_file, "r") as f:
-                self.cache = json.load(f)
-            if len(self.cache) == 0:
-                self.logger.info("Cache is empty.")
-            else:
-                self.logger.info(f"Cache loaded successfully: {len(self.cache)} entries.")
-        else:
-            self.logger.info("Cache not found.")
+        try:
+            with open(self.cache_file, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return
+        legacy = _json_loads(raw) if raw.strip() else {}
+
+        if legacy:
+            self.logger.info("Migrating %d legacy cache entries to %s...", len(legacy), self._db_file)
+            with self._db_lock:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO cache VALUES (?, ?)",
+                    ((key, _json_dumps(landmarks)) for key, landmarks in legacy.items()),
+                )
+                self._db.execute("COMMIT")
+        os.replace(self.cache_file, self.cache_file + ".migrated")
+        self.logger.info("Legacy cache migrated successfully")
 
-    def _save_cache(self):
+    def _get(self, key):
         """
-        Saves the current in-memory cache to the cache file. Logs the operation and success status.
+        Looks up a single cache entry.
+        :param key: "City, State" cache key.
+        :return: The cached landmark list, or None if `key` is not cached or its last fetch failed.
         """
-        self.logger.info("Saving cache...")
-        with open(self.cache_file, "w") as f:
-            json.dump(self.cache, f, indent=2)
-        self.logger.info("Cache saved successfully")
-
-    def _respect_rate_limit(self):
-        """Ensures no request is made faster than request_delay seconds."""
-        now = time.time()
-        elapsed = now - self._last_request_time
+        with self._db_lock:
+            row = self._db.execute("SELECT v FROM cache WHERE k = ?", (key,)).fetchone()
+        return _json_loads(row[0]) if row else None
 
-        if elapsed < self.request_delay:
-            time.sleep(self.request_delay - elapsed)
+    def _put(self, key, landmarks):
+        """
+        Stores a single cache entry, replacing any previous value.
+        :param key: "City, State" cache key.
+        :param landmarks: Landmark list stored under `key`, or None to record a failed fetch.
+        """
+        value = _json_dumps(landmarks)
+        with self._db_lock:
+            self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?)", (key, value))
 
-        self._last_request_time = time.time()
+    def compact(self):
+        """
+        Checkpoints the SQLite write-ahead log into the database file and truncates the log.
+        """
+        with self._db_lock:
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
-    def fetch_landmarks(self, city: str, state: str):
+    def _respect_rate_limit(self, endpoint):
+        """
+        Ensures no request is made to `endpoint` faster than its token bucket allows.
+        :param endpoint: Overpass endpoint URL the next request goes to.
+        """
+        with self._buckets_lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                bucket = self._buckets[endpoint] = TokenBucket(1 / self.request_delay, self._burst)
+        wait = bucket.acquire()
+        if wait:
+            time.sleep(wait)
+
+    def fetch_landmarks(self, city: str, state: str, endpoint=None):
         """
         Fetches landmarks for a given city and state using the Overpass API.
         Applies rate limiting, retries with exponential backoff, caches results, and returns a list of landmarks
         (each a dict with name, lat, lon).
         :param city: the city to fetch landmarks for
         :param state: the state to fetch landmarks for
+        :param endpoint: Overpass endpoint for the first attempt; a random one from `endpoints` is used if omitted.
+            Retries rotate through `endpoints`.
         :return: a list of dicts with name, latitude (lat), longitude (lon) key-value pairs
         """
+        # Return cached; repeat lookups are answered by the in-memory memo without touching the store
+        try:
+            return self._mem_cache(city, state)
+        except KeyError:
+            return self._fetch_landmarks_uncached(city, state, endpoint)
+
+    def _lookup_cached(self, city, state):
+        """
+        Reads a city's landmarks from the cache store. Wrapped by `functools.lru_cache` in `__init__`; misses raise
+        instead of returning so they are not memoized.
+        :param city: the city to look up
+        :param state: the state to look up
+        :return: the cached landmark list
+        :raises KeyError: if the city/state pair is not cached yet
+        """
         key = f"{city}, {state}"
+        landmarks = self._get(key)
+        if landmarks is None:
+            raise KeyError(key)
+        return landmarks
 
-        # Return cached
-        if key in self.cache:
-            return self.cache[key]
-
-        # Overpass Query
-        query = f"""
-        [out:json][timeout:25];
-        area["ISO3166-2"="US-{state}"]->.stateArea;
-        area["name"="{city}"]["boundary"="administrative"](area.stateArea)->.cityArea;
-        (
-          node["tourism"](area.cityArea);
-          node["amenity"](area.cityArea);
-          node["historic"](area.cityArea);
-          node["leisure"](area.cityArea);
-        );
-        out center;
+    def _fetch_landmarks_uncached(self, city, state, endpoint=None):
+        """
+        Fetches landmarks for a city/state pair from the Overpass API and stores them in the cache.
+        :param city: the city to fetch landmarks for
+        :param state: the state to fetch landmarks for
+        :param endpoint: Overpass endpoint for the first attempt; a random one from `endpoints` is used if omitted.
+            Retries rotate through `endpoints`.
+        :return: a list of dicts with name, latitude (lat), longitude (lon) key-value pairs
         """
+        key = f"{city}, {state}"
 
-        headers = {"User-Agent": f"COMSC 230: Final Project ({PROPERTY["EMAIL"]})"}
+        # Overpass Query (quotes and backslashes in the names are escaped for the QL string literals)
+        query = _QUERY_TEMPLATE % (_ql_escape(state), _ql_escape(city))
         data = []
+        if endpoint is None:
+            endpoint = random.choice(self.endpoints)
+        # The first attempt goes to `endpoint`; retries rotate through the mirrors so one that is down
+        # or overloaded does not consume every attempt
+        first = self.endpoints.index(endpoint) if endpoint in self.endpoints else -1
 
         # Retry logic
         for attempt in range(1, self.max_retries + 1):
+            if attempt > 1:
+                endpoint = self.endpoints[(first + attempt - 1) % len(self.endpoints)]
             try:
                 # Enforce rate limit on EVERY request attempt
-                self._respect_rate_limit()
-                self.logger.info(f"Attempting to fetch landmarks for {key}...")
-                response = requests.post(
-                    random.choice(self.endpoints),
+                self._respect_rate_limit(endpoint)
+                self.logger.info("Attempting to fetch landmarks for %s...", key)
+                response = self._session.post(
+                    endpoint,
                     data={"data": query},
-                    headers=headers,
+                    headers=self._headers,
                     timeout=40,
                 )
                 response.raise_for_status()
@@ -219,60 +375,91 @@ class LandmarksClient:
             except Exception as _:
                 # Retry or fail
                 if attempt < self.max_retries:
-                    self.logger.warning(f"Failed to fetch landmarks for {key}. \nRetrying, {self.max_retries - attempt} attempts left...")
+                    self.logger.warning(
+                        "Failed to fetch landmarks for %s. \nRetrying, %d attempts left...", key, self.max_retries - attempt
+                    )
                     delay = self.request_delay * (self.backoff_factor ** (attempt - 1))
                     time.sleep(delay)
                 else:
-                    self.logger.error(f"Failed to fetch landmarks for {key}. No more attempts left. Saving None.")
-                    self.cache[key] = []
-                    self._save_cache()
+                    self.logger.error("Failed to fetch landmarks for %s. No more attempts left. Saving None.", key)
+                    # None marks a failed lookup (retried on the next run); [] is a successful empty result
+                    self._put(key, None)
                     return []
 
         # Parse response
-        self.logger.info(f"Fetched landmarks for {key} successfully.")
+        self.logger.info("Fetched landmarks for %s successfully.", key)
         elements = data.get("elements", [])
         landmarks = [
             {
-                "name": el.get("tags", {}).get("name"),
-                "lat": el["lat"],
-                "lon": el["lon"],
+                "name": (el.get("tags") or _EMPTY_TAGS).get("name"),
+                "lat": lat,
+                "lon": lon,
             }
             for el in elements
-            if "lat" in el and "lon" in el
+            if (lat := el.get("lat")) is not None and (lon := el.get("lon")) is not None
         ]
 
         # Add to cache
-        self.cache[key] = landmarks
-
-        # Save cache to file
-        self.logger.info(f"Caching {len(landmarks)} landmarks to {key}...")
-        self._save_cache()
-        self.logger.info(f"Landmarks for {key} cached successfully")
+        self.logger.info("Caching %d landmarks to %s...", len(landmarks), key)
+        self._put(key, landmarks)
+        self.logger.info("Landmarks for %s cached successfully", key)
 
         return landmarks
 
+    def _fetch_from_endpoint(self, endpoint, city_state_pairs, progress):
+        """
+        Fetches landmarks for a partition of city/state pairs. Every first attempt goes to `endpoint`; retries fail
+        over to the other endpoints.
+        :param endpoint: Overpass endpoint URL the partition's first attempts are sent to.
+        :param city_state_pairs: city/state pairs assigned to this endpoint
+        :param progress: shared tqdm progress bar, advanced once per pair
+        :return: a dictionary mapping (city, state) tuples to landmark lists
+        """
+        results = {}
+        for pair in city_state_pairs:
+            results[pair] = self.fetch_landmarks(*pair, endpoint)
+            progress.update()
+        return results
+
     def fetch_landmarks_for_cities(self, city_state_pairs):
         """
         Fetches landmarks for multiple city/state pairs in bulk.
+        The pairs are partitioned round-robin across the endpoints and fetched by one worker thread per endpoint,
+        so the per-endpoint rate limits run concurrently.
         Uses tqdm to display progress, caches results, and returns a dictionary mapping "City, State" to landmark lists.
-        :param city_state_pairs: a list of unique city/state pairs
+        :param city_state_pairs: a list of city/state pairs; duplicates are fetched only once
         :return: a list of dicts with name, latitude (lat), longitude (lon) key-value pairs
         """
-        # Initialize results
-        results = {}
+        # Deduplicate (order-preserving) so a repeated pair never costs a second lookup or request
+        city_state_pairs = list(dict.fromkeys(map(tuple, city_state_pairs)))
+        n_endpoints = len(self.endpoints)
+        partitions = [city_state_pairs[i::n_endpoints] for i in range(n_endpoints)]
 
-        # Fetch landmarks from API or cache
+        # Fetch landmarks from API or cache, checkpointing the store once at the end
         self.logger.info("Fetching landmarks...")
-        for city, state in tqdm(city_state_pairs, desc="Fetching landmarks", colour="green"):
-            results[f"{city}, {state}"] = self.fetch_landmarks(city, state)
-        self.logger.info(f"Fetched landmarks for {len(results)} cities successfully.")
+        fetched = {}
+        try:
+            with tqdm(total=len(city_state_pairs), desc="Fetching landmarks", colour="green") as progress, \
+                    ThreadPoolExecutor(max_workers=n_endpoints) as executor:
+                for partition_results in executor.map(
+                    self._fetch_from_endpoint, self.endpoints, partitions, repeat(progress)
+                ):
+                    fetched.update(partition_results)
+        finally:
+            self.compact()
+
+        # Keep results in input order; the "City, State" string keys are built once here
+        results = {f"{city}, {state}": fetched[(city, state)] for city, state in city_state_pairs}
+        self.logger.info("Fetched landmarks for %d cities successfully.", len(results))
 
         # Return results
         return results
 
     def get_cache(self):
         """
-        Returns the current in-memory cache dictionary for inspection or export.
+        Reads the whole cache store into a dictionary for inspection or export.
         :return: a dictionary mapping city/state pairs to landmarks
         """
-        return self.cache
+        with self._db_lock:
+            rows = self._db.execute("SELECT k, v FROM cache").fetchall()
+        return {key: _json_loads(value) for key, value in rows}
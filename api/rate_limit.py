@@ -0,0 +1,55 @@
+"""
+Token-Bucket Rate Limiting
+==========================
+
+This module provides a small thread-safe token bucket used by the API clients
+to pace requests to rate-limited services.
+
+Classes
+-------
+- `TokenBucket(rate, capacity)`
+  Holds up to `capacity` tokens that refill at `rate` tokens per second.
+  `acquire()` takes one token and returns how long the caller must sleep before
+  sending its request (`0.0` when a token was available).
+
+Notes
+-----
+- With `capacity=1` the bucket behaves like a strict minimum gap of `1 / rate`
+  seconds between requests; larger capacities allow short bursts.
+- Tokens are reserved under a lock, so concurrent callers never share a slot.
+  A caller that must wait takes its token in advance (the bucket goes negative),
+  so later callers queue up behind it instead of racing for the refill.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that tells callers how long to wait before each request.
+    """
+    __slots__ = ("_rate", "_capacity", "_tokens", "_last", "_lock")
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """
+        Creates a full bucket.
+        :param rate: Tokens added per second (1 / minimum delay between requests).
+        :param capacity: Maximum number of tokens, i.e. the largest allowed burst.
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Takes one token from the bucket.
+        :return: Seconds the caller must sleep before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
@@ -19,7 +19,7 @@ Pipeline Overview:
 
     3. **Coordinate Retrieval**
        - Creates API clients required for geocoding.
-       - Fetches coordinates for city centers and nearby landmarks.
+       - Fetches coordinates for city centers and nearby landmarks concurrently.
        - Validates that all requests complete successfully.
 
     4. **Nearest-Neighbor Enrichment**
@@ -67,18 +67,19 @@ from utils.geo.nearest_utils import append_apartments_with_nearest
 from visualization.plot_generator import scatter, heatmap, plot3d, histogram
 from visualization.interactive_map import InteractiveMapBuilder
 from visualization.regression import run_ols_models
-import importlib, Settings
+import Settings
+from concurrent.futures import ThreadPoolExecutor
 from utils.devtools.multithread_logger import AsyncFileLogger
 
 # Instantiate logger
 log = AsyncFileLogger()
 log.info("Initializing...")
 
-# Force reload in sys.modules to reread .env
-importlib.reload(Settings)
+# Reread .env if it changed since Settings was first imported
+Settings.Settings.refresh()
 
 try:
-    # Access reloaded env
+    # Access refreshed env
     try:
         log.info("Configuring settings...")
         PROPERTY = Settings.ENV
@@ -104,18 +105,23 @@ try:
             log.info("API clients successfully generated.")
         except Exception as e:
             raise RuntimeError("Could not create API clients")
-        try:
-            log.info("Fetching city center coordinates...")
-            city_centers = city_client.generate_all_city_centers(df)
-            log.info("City centers successfully generated.")
-        except Exception as _:
-            raise RuntimeError("Could not fetch city center coordinates")
-        try:
+        # Both clients only need the unique city-state pairs, and they query different services,
+        # so landmarks are fetched on a background thread while city centers are resolved
+        cities = df[['cityname', 'state']].drop_duplicates()
+        with ThreadPoolExecutor(max_workers=1) as pool:
             log.info("Fetching landmark coordinates...")
-            landmarks_by_city = landmark_client.fetch_landmarks_for_cities(df[['cityname','state']].drop_duplicates().values.tolist())
-            log.info("Landmarks successfully fetched.")
-        except Exception as _:
-            raise RuntimeError("Could not fetch landmark coordinates")
+            landmarks_future = pool.submit(landmark_client.fetch_landmarks_for_cities, cities.values.tolist())
+            try:
+                log.info("Fetching city center coordinates...")
+                city_centers = city_client.generate_all_city_centers(cities)
+                log.info("City centers successfully generated.")
+            except Exception as _:
+                raise RuntimeError("Could not fetch city center coordinates")
+            try:
+                landmarks_by_city = landmarks_future.result()
+                log.info("Landmarks successfully fetched.")
+            except Exception as _:
+                raise RuntimeError("Could not fetch landmark coordinates")
     except Exception as e:
         raise RuntimeError(e)
 
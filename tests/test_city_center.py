@@ -0,0 +1,59 @@
+"""
+Tests for `api.city_center.CityCentersClient` request error handling.
+Run from the project root (with a `.env` in place) via `python -m unittest`.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from api.city_center import CityCentersClient
+
+
+class _Response:
+    """
+    Minimal stand-in for a successful `requests.Response` with a fixed body.
+    """
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class MalformedResponseTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.client = CityCentersClient(
+            cache_file=os.path.join(self._tmp.name, "city_centers.json"),
+            request_delay=0, max_retries=3, backoff_factor=1,
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_non_json_body_is_retried_then_cached_as_none(self):
+        with mock.patch.object(self.client._session, "get", return_value=_Response(b"<html>busy</html>")) as get:
+            self.assertIsNone(self.client.fetch_city_center("Baltimore", "MD"))
+
+        self.assertEqual(get.call_count, self.client.max_retries)
+        self.assertIn("Baltimore, MD", self.client.cache)
+        self.assertIsNone(self.client.cache["Baltimore, MD"])
+
+    def test_truncated_body_does_not_abort_bulk_lookup(self):
+        import pandas as pd
+
+        bodies = {"Baltimore, MD, USA": b'[{"lat": "39.29", "lo', "Austin, TX, USA": b'[{"lat": "30.27", "lon": "-97.74"}]'}
+        fake_get = lambda url, params, timeout: _Response(bodies[params["q"]])
+        df = pd.DataFrame({"cityname": ["Baltimore", "Austin"], "state": ["MD", "TX"]})
+        with mock.patch.object(self.client._session, "get", side_effect=fake_get):
+            centers = self.client.generate_all_city_centers(df)
+
+        self.assertIsNone(centers["Baltimore, MD"])
+        self.assertEqual(centers["Austin, TX"], {"lat": 30.27, "lon": -97.74})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,11 +3,16 @@ IO utility functions for loading, cleaning, and saving Excel-based tabular data.
 
 This module provides a small data-processing pipeline built around Pandas:
     - `load_xlsx` reads an Excel file into a DataFrame and validates its existence.
+      A Parquet copy is cached next to the workbook on first load and read
+      instead of the workbook for as long as it is newer.
     - `clean_data` applies a series of cleaning operations, including removal of
       missing values, unrealistic price ranges, and non-monthly price entries.
     - `load_and_clean_data` combines the above steps and logs any errors through
       the asynchronous logger.
-    - `save_xlsx` exports a cleaned DataFrame back to an Excel file.
+    - `save_xlsx` exports a cleaned DataFrame back to an Excel file, or to
+      Parquet/Feather when the path ends in `.parquet`/`.feather`.
+    - `write_xlsx` streams a DataFrame into a workbook with openpyxl's
+      write-only mode.
 
 The cleaning logic assumes the presence of certain columns, such as `price` and
 `price_type`, and uses a `relevant_columns` list (typically supplied by a
@@ -18,7 +23,9 @@ encountered during reading or cleaning.
 
 Dependencies:
     - pandas
-    - openpyxl
+    - python-calamine (optional) for fast Excel reads, with an openpyxl fallback
+    - openpyxl for writing workbooks
+    - pyarrow (optional) for the Parquet copy of the workbook and Parquet/Feather exports
     - devtools.multithread_logger.AsyncFileLogger
 
 Intended use:
@@ -28,25 +35,55 @@ Intended use:
 """
 import os.path
 import pandas as pd
+from openpyxl import Workbook
 from utils.devtools.multithread_logger import AsyncFileLogger
 from Settings import ENV as PROPERTY
 
 # Instantiate logger
 log = AsyncFileLogger()
 
+# Prefer the Rust-based calamine reader for Excel files; fall back to pandas' default engine (openpyxl)
+try:
+    import python_calamine  # noqa: F401
+    _EXCEL_ENGINE = "calamine"
+except ImportError:
+    _EXCEL_ENGINE = None
+
+# Parquet copies of loaded workbooks need pyarrow
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PARQUET = True
+except ImportError:
+    _HAS_PARQUET = False
+
 
 def load_xlsx(path):
     """
-    Reads an Excel file into a Pandas Dataframe Object
+    Reads an Excel file into a Pandas Dataframe Object.
+    The first load also writes a zstd-compressed Parquet copy to `<path>.parquet`; later loads read that copy
+    as long as it is at least as new as the workbook.
     :param path: Path to the Excel file.
     :return: pd.DataFrame: Pandas Dataframe Object
     :raises FileNotFoundError: If file does not exist.
     """
-    if os.path.exists(path):
-        return pd.read_excel(path)
-    else:
+    if not os.path.exists(path):
         raise FileNotFoundError(f"Excel file not found: {path}")
 
+    parquet = f"{path}.parquet"
+    if _HAS_PARQUET and os.path.exists(parquet) and os.path.getmtime(parquet) >= os.path.getmtime(path):
+        return pd.read_parquet(parquet)
+
+    df = pd.read_excel(path, engine=_EXCEL_ENGINE)
+    if _HAS_PARQUET:
+        try:
+            df.to_parquet(parquet, compression="zstd")
+        except Exception as e:
+            # Columns Arrow cannot type (e.g. mixed object columns) only cost the cached copy
+            log.warning("Could not cache %s as Parquet: %s", path, e)
+            if os.path.exists(parquet):
+                os.remove(parquet)
+    return df
+
 
 def clean_data(df, relevant_columns):
     """
@@ -59,19 +96,15 @@ def clean_data(df, relevant_columns):
     :param relevant_columns: imported from the Settings object
     :return: Pandas DataFrame Object
     """
-    # Drop missing values in key columns
-    df = df.dropna(subset=relevant_columns)
-
-    # Remove unrealistic prices
-    df = df[(df['price'] > PROPERTY['MIN_PRICE']) & (df['price'] < PROPERTY['MAX_PRICE'])]
-
-    # Remove rows where price_type is not monthly
-    df = df[df['price_type'] == 'Monthly']
+    # Combine all row filters into one mask so the frame is copied only once
+    mask = (
+        df[relevant_columns].notna().all(axis=1)  # Missing values in key columns
+        & df['price'].between(PROPERTY['MIN_PRICE'], PROPERTY['MAX_PRICE'], inclusive='neither')  # Unrealistic prices
+        & (df['price_type'] == 'Monthly')  # Non-monthly prices
+    )
 
     # Remove the price_type column once it's been used to filter
-    df = df.drop(columns=['price_type'])
-
-    return df
+    return df.loc[mask].drop(columns=['price_type'])
 
 
 def load_and_clean_data(path, relevant_columns):
@@ -94,12 +127,43 @@ def load_and_clean_data(path, relevant_columns):
         raise e
 
 
+def write_xlsx(df, path, index=False):
+    """
+    Writes a Pandas DataFrame object to an Excel file using openpyxl's write-only mode, which streams rows to disk
+    instead of building a styled cell object for every value the way `DataFrame.to_excel` does.
+    Missing values are written as empty cells.
+    :param df: Pandas DataFrame Object
+    :param path: Path to the Excel file.
+    :param index: Whether to write the index as the first column.
+    :return: None
+    """
+    if index:
+        df = df.reset_index()
+    wb = Workbook(write_only=True)
+    # Same sheet name as `DataFrame.to_excel`
+    ws = wb.create_sheet(title="Sheet1")
+    ws.append([str(column) for column in df.columns])
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(path)
+
+
 def save_xlsx(df, path):
     """
     Saves a Pandas DataFrame object to an Excel file.
+    Paths ending in `.parquet` or `.feather` are written with pyarrow instead, which is much faster and smaller.
     :param df: Pandas DataFrame Object
     :param path: Path to the Excel file.
     :return: None
     """
-    df.to_excel(path, index=False)
-    print(f"Excel file saved to {path}")
\ No newline at end of file
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".parquet":
+        df.to_parquet(path, index=False, compression="zstd")
+        file_type = "Parquet"
+    elif suffix == ".feather":
+        df.reset_index(drop=True).to_feather(path)
+        file_type = "Feather"
+    else:
+        write_xlsx(df, path)
+        file_type = "Excel"
+    print(f"{file_type} file saved to {path}")
@@ -3,21 +3,110 @@ Asynchronous, thread-safe file logger.
 
 Provides the `AsyncFileLogger` class, which logs messages to disk via a queue
 to avoid blocking execution. Supports info, error, warning, and debug levels.
+Messages accept %-style arguments, which are only formatted when the level is
+enabled.
 Designed to safely work in loops with progress bars (e.g., tqdm) or
 applications that may terminate abruptly. Automatically manages log file
 rotation and flushes remaining messages on exit.
 
+Both modes write through a buffered file handler that flushes every
+`_FLUSH_EVERY` records, on errors, and on exit. In the default asynchronous
+mode the listener thread also flushes whenever the queue runs dry, so bursts
+of records share one write while an idle logger is always up to date on disk.
+For paths with a single producer, `async_mode=False` skips the queue and the
+listener thread and attaches the buffered handler directly.
+Timestamps are formatted once per second rather than once per record.
+
 NOTE: The class implements a runtime-configurable instantiation strategy: it behaves as a global singleton when
 module-based logging is disabled and as a multiton/factory when module-based logging is enabled.
 """
 import logging
+import sys
 from logging.handlers import QueueHandler, QueueListener
 from queue import SimpleQueue
 from pathlib import Path
 import threading
 import atexit
+import time
 from Settings import ENV as PROPERTY
 
+# Records buffered by the synchronous handler before it flushes to disk
+_FLUSH_EVERY = 100
+
+# Write buffer size of the synchronous handler's log file
+_BUFFER_SIZE = 65536
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that writes through a large buffer and flushes every `flush_every` records (and on every error)
+    instead of after each record.
+    """
+
+    def __init__(self, filename, flush_every: int = _FLUSH_EVERY, buffer_size: int = _BUFFER_SIZE):
+        """
+        :param filename: Path to the log file.
+        :param flush_every: Number of records written between flushes.
+        :param buffer_size: Size of the file's write buffer in bytes.
+        """
+        self._flush_every = flush_every
+        self._buffer_size = buffer_size
+        self._pending = 0
+        super().__init__(filename, encoding="utf-8")
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self._buffer_size, encoding=self.encoding,
+                    errors=self.errors)
+
+    def emit(self, record):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        self._pending += 1
+        if self._pending >= self._flush_every or record.levelno >= logging.ERROR:
+            self.flush()
+
+    def flush(self):
+        super().flush()
+        self._pending = 0
+
+
+class _CachedTimeFormatter(logging.Formatter):
+    """
+    Formatter that renders the `asctime` prefix once per second and reuses it for every record logged within
+    that second, appending only the milliseconds.
+    """
+
+    def __init__(self, fmt=None):
+        """
+        :param fmt: Format string, as for `logging.Formatter`.
+        """
+        super().__init__(fmt)
+        self._cached = (None, "")
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, prefix = self._cached
+        if second != cached_second:
+            prefix = time.strftime(self.default_time_format, self.converter(record.created))
+            self._cached = (second, prefix)
+        return self.default_msec_format % (prefix, record.msecs)
+
+
+class _BatchingQueueListener(QueueListener):
+    """
+    Queue listener that flushes its handlers once the queue has been drained, so records that arrive in a burst
+    reach the disk in a single write.
+    """
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
 
 class AsyncFileLogger:
     """
@@ -30,7 +119,7 @@ class AsyncFileLogger:
 
     _listeners = {}  # class-level cache to prevent duplicate listeners
 
-    def __new__(cls, module_name: str = None, base_dir: str = "out/logs"):
+    def __new__(cls, module_name: str = None, base_dir: str = "out/logs", async_mode: bool = True):
         """
         Ensure that when module-based logging is disabled, the class behaves like a singleton.
         Otherwise, the class behaves like a factory
@@ -48,7 +137,7 @@ class AsyncFileLogger:
         # Otherwise: Factory behavior (one logger per module)
         return super().__new__(cls)
 
-    def __init__(self, module_name: str = None, base_dir: str = "out/logs"):
+    def __init__(self, module_name: str = None, base_dir: str = "out/logs", async_mode: bool = True):
         """
         Initializes an asynchronous file logger for the given module. Sets up a log directory, creates a new log file
         with an incremented index, and starts a thread-safe listener to write logs to disk.
@@ -57,22 +146,22 @@ class AsyncFileLogger:
 
         :param module_name: Name of the module to log to.
         :param base_dir: Base directory to write log files into.
+        :param async_mode: Log through a queue and listener thread (default). When False, records are written
+            directly by the calling thread through a buffered file handler.
         """
 
         # Prevent re-initialization of the singleton instance
         if not self._module_logging and hasattr(self, "_initialized"):
             return
 
-        # Determine module name if not provided
-        import inspect
-        if module_name is None:
-            frame = inspect.stack()[1]
-            module_name = Path(frame.filename).stem
-
         # If module logging is OFF, override module_name with a fixed one (project_name)
         if not self._module_logging:
             module_name = "proxicity"
 
+        # Otherwise determine module name from the caller's frame if not provided
+        elif module_name is None:
+            module_name = Path(sys._getframe(1).f_code.co_filename).stem
+
         self.module_name = module_name
 
         # Set up log directory
@@ -94,23 +183,32 @@ class AsyncFileLogger:
         self.logger.setLevel(logging.INFO)
         self.logger.propagate = False  # prevent double logging
 
-        # Thread-safe queue
-        self.queue = SimpleQueue()
+        formatter = _CachedTimeFormatter("%(asctime)s [%(levelname)s] %(message)s")
+        if async_mode:
+            # Thread-safe queue
+            self.queue = SimpleQueue()
 
-        # QueueHandler sends logs to the queue
-        queue_handler = QueueHandler(self.queue)
-        self.logger.addHandler(queue_handler)
+            # QueueHandler sends logs to the queue
+            queue_handler = QueueHandler(self.queue)
+            self.logger.addHandler(queue_handler)
 
-        # File handler writes logs to disk
-        file_handler = logging.FileHandler(self.log_file, encoding="utf-8")
-        file_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+            # Buffered file handler writes logs to disk
+            file_handler = _BufferedFileHandler(self.log_file)
+            file_handler.setFormatter(formatter)
 
-        # QueueListener reads from the queue and writes to file
-        self.listener = QueueListener(self.queue, file_handler)
-        self.listener.start()
+            # QueueListener reads from the queue, writes to file and flushes once the queue is drained
+            self.listener = _BatchingQueueListener(self.queue, file_handler, respect_handler_level=True)
+            self.listener.start()
 
-        # Keep track to avoid multiple listeners for same module
-        AsyncFileLogger._listeners[self.module_name] = self.listener
+            # Keep track to avoid multiple listeners for same module
+            AsyncFileLogger._listeners[self.module_name] = self.listener
+        else:
+            # Buffered file handler attached directly; logging.shutdown flushes it on exit
+            self.queue = None
+            self.listener = None
+            file_handler = _BufferedFileHandler(self.log_file)
+            file_handler.setFormatter(formatter)
+            self.logger.addHandler(file_handler)
 
         # Ensure this only runs once for global singleton
         self._initialized = True
@@ -128,30 +226,34 @@ class AsyncFileLogger:
             listener.stop()
 
     # Logging methods
-    def info(self, msg: str):
+    def info(self, msg: str, *args):
         """
         Logs an info-level message asynchronously to the log file.
-        :param msg: Info-level message.
+        :param msg: Info-level message, optionally a %-format string.
+        :param args: Arguments merged into `msg` only if the level is enabled.
         """
-        self.logger.info(msg)
+        self.logger.info(msg, *args)
 
-    def error(self, msg: str):
+    def error(self, msg: str, *args):
         """
         Logs an error-level message asynchronously to the log file.
-        :param msg: Error-level message.
+        :param msg: Error-level message, optionally a %-format string.
+        :param args: Arguments merged into `msg` only if the level is enabled.
         """
-        self.logger.error(msg)
+        self.logger.error(msg, *args)
 
-    def warning(self, msg: str):
+    def warning(self, msg: str, *args):
         """
         Logs a warning-level message asynchronously to the log file.
-        :param msg: Warning-level message.
+        :param msg: Warning-level message, optionally a %-format string.
+        :param args: Arguments merged into `msg` only if the level is enabled.
         """
-        self.logger.warning(msg)
+        self.logger.warning(msg, *args)
 
-    def debug(self, msg: str):
+    def debug(self, msg: str, *args):
         """
         Logs a debug-level message asynchronously to the log file.
-        :param msg: Debug-level message.
+        :param msg: Debug-level message, optionally a %-format string.
+        :param args: Arguments merged into `msg` only if the level is enabled.
         """
-        self.logger.debug(msg)
+        self.logger.debug(msg, *args)
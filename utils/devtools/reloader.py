@@ -19,15 +19,16 @@ def reload_everything():
     Reload all modules under the project package, including Settings,
     in correct top-down order. Safe for development hot-reloads.
     """
-    modules_to_reload = []
-
-    # Collect module objects that belong to your project
-    for name, module in sys.modules.items():
-        if isinstance(module, ModuleType) and name.startswith(PROJECT_ROOT):
-            modules_to_reload.append((name, module))
-
-    # Sort so parent packages reload before submodules
-    modules_to_reload.sort(key=lambda pair: pair[0].count("."))
+    # Collect module objects that belong to your project from a snapshot of sys.modules,
+    # since reloading can import new modules; modules without a spec cannot be reloaded
+    modules_to_reload = [
+        (name, module) for name, module in list(sys.modules.items())
+        if isinstance(module, ModuleType) and name.startswith(PROJECT_ROOT)
+        and getattr(module, "__spec__", None) is not None
+    ]
+
+    # Sort by dotted path so every parent package reloads right before its submodules, in a stable order
+    modules_to_reload.sort(key=lambda pair: pair[0].split("."))
 
     print("\nReloading project modules...\n")
 
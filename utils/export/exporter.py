@@ -2,10 +2,13 @@
 Provides utility functions to export summary statistics and correlation matrices of apartment/listing data
 to Excel files.
 
+Workbooks are written through `utils.dataio.data_io.write_xlsx`, which streams rows with openpyxl's write-only mode.
+
 Functions:
 - export_summary(df, path): Exports descriptive statistics of the DataFrame to an Excel file.
 - export_correlation(df, path): Exports the correlation matrix of the DataFrame to an Excel file.
 """
+from utils.dataio.data_io import write_xlsx
 
 
 def export_summary(df, path):
@@ -15,7 +18,7 @@ def export_summary(df, path):
     :param df: DataFrame of apartment prices and distances to city centers and landmarks.
     :param path: Path to output Excel file.
     """
-    df.describe().to_excel(path, index=False)
+    write_xlsx(df.describe(), path)
 
 
 def export_correlation(df, path):
@@ -24,4 +27,4 @@ def export_correlation(df, path):
     :param df: DataFrame of apartment prices and distances to city centers and landmarks.
     :param path: Path to output Excel file.
     """
-    df.corr().to_excel(path, index=False)
\ No newline at end of file
+    write_xlsx(df.corr(), path)
\ No newline at end of file
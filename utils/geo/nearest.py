@@ -1,35 +1,198 @@
 """
-BallTree Utility Functions for Geographic Coordinates
-=====================================================
+Nearest-Neighbor Utility Functions for Geographic Coordinates
+=============================================================
 
 This module provides helper functions for working with latitude/longitude
-coordinates using a BallTree data structure for fast nearest-neighbor queries.
+coordinates using a k-d tree for fast nearest-neighbor queries.
+
+Coordinates are mapped onto the unit sphere as 3-D Cartesian points, where the
+straight-line (chord) distance between two points is a monotonic function of
+their great-circle distance. The nearest neighbor by chord is therefore the
+nearest neighbor by haversine distance, and the chord is converted back to an
+exact great-circle distance in miles. This lets SciPy's C `cKDTree` replace the
+haversine BallTree at any scale, without the distortion of a planar projection.
 
 Functions
 ---------
 - `_validate_coords(coords)`
-  Validates a coordinate pair, ensuring it is not None or NaN.
+  Validates a single coordinate pair, ensuring it is not None, NaN or infinite. Point sets
+  are filtered with the equivalent vectorized `np.isfinite` mask instead.
 
-- `build_balltree(coords_list)`
-  Constructs a BallTree from a list of [latitude, longitude] pairs.
-  Returns both the BallTree (with coordinates in radians) and the original array in degrees.
+- `build_balltree(coords_list, leaf_size=None)`
+  Constructs a `cKDTree` from a list of [latitude, longitude] pairs, with a leaf size scaled to the point count.
+  Returns both the tree (over unit-sphere Cartesian coordinates) and the original array in degrees.
+  Point sets smaller than `_BRUTE_FORCE_MAX_POINTS` get a `_BruteForceIndex` instead,
+  which exposes the same `query` interface.
 
 - `query_balltree(tree, point)`
-  Queries the nearest neighbor for a given point in the BallTree.
+  Queries the nearest neighbor for a given point in the tree.
   Returns the distance in miles and the index of the closest point, or (np.nan, None)
   if the tree is None.
 
+- `query_balltree_batch(tree, points)`
+  Queries the nearest neighbor for every point of an (n, 2) array in a single call.
+  Returns arrays of distances in miles and indices, or (NaN, -1) arrays if the tree is None.
+
+- `query_unit_batch(tree, points_xyz)`
+  Same as `query_balltree_batch` for points already mapped onto the unit sphere with
+  `_to_unit_xyz`, so one conversion can be shared by queries against several trees.
+
+- `query_segments(points_xyz, rows, row_offsets, xyz, offsets)`
+  Answers the queries of many small point sets, concatenated into one array with segment
+  offsets, in a single exhaustive-search call instead of one `query` per point set.
+
 Notes
 -----
-- Distances are computed using the haversine metric.
-- The module depends on `numpy` and `scikit-learn` for BallTree operations.
+- Distances are great-circle (haversine) distances.
+- For small point sets an exhaustive search beats building a tree; `_BruteForceIndex`
+  finds the largest dot product behind `cKDTree`'s `query(points, k=1)`. When Numba is
+  installed the search runs in a fused JIT-compiled kernel; otherwise it is a
+  NumPy matrix product followed by an argmax. The kernel is serial but releases the GIL, so
+  callers parallelize across batches with threads (a parallel kernel cannot safely be
+  launched from several threads at once, and per-city batches are too small to split).
+- The module depends on `numpy` and `scipy` for k-d tree operations.
 - Earth radius in miles is read from `Settings.ENV["EARTH_RADIUS_MILES"]`.
+- The function names predate the switch from BallTree and are kept for compatibility.
 """
 import numpy as np
 from numpy.typing import ArrayLike
-from sklearn.neighbors import BallTree
+from scipy.spatial import cKDTree
 from Settings import ENV as PROPERTY
 
+# Prefer a Numba-compiled kernel for the exhaustive search; fall back to NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Point sets smaller than this are searched exhaustively instead of through a tree
+_BRUTE_FORCE_MAX_POINTS = 64
+
+# Upper bound on the (queries x points) dot-product block evaluated at once by `_BruteForceIndex`
+_BRUTE_FORCE_BLOCK = 1 << 20
+
+# Bounds of the default k-d tree leaf size, which grows with the point count (see `_default_leaf_size`)
+_MIN_LEAF_SIZE = 16
+_MAX_LEAF_SIZE = 64
+
+
+def _to_unit_xyz(coords_deg: np.ndarray) -> np.ndarray:
+    """
+    Maps [lat, lon] pairs in degrees onto the unit sphere.
+    :param coords_deg: Array of [lat, lon] pairs in degrees, shape (n, 2).
+    :return: Array of [x, y, z] points, shape (n, 3).
+    """
+    lat, lon = np.radians(coords_deg[:, 0]), np.radians(coords_deg[:, 1])
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def _chord_to_miles(chord: np.ndarray) -> np.ndarray:
+    """
+    Converts unit-sphere chord lengths to great-circle distances in miles.
+    :param chord: Chord lengths between points on the unit sphere.
+    :return: Great-circle distances in miles.
+    """
+    return 2 * PROPERTY["EARTH_RADIUS_MILES"] * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _nearest_kernel(points_xyz, xyz):
+        """
+        Finds, for every query point, the indexed point with the largest dot product and the chord between them.
+        :param points_xyz: Unit-sphere Cartesian query points, shape (m, 3).
+        :param xyz: Unit-sphere Cartesian indexed points, shape (n, 3).
+        :return: Chord distances and indices, both of shape (m,).
+        """
+        m, n = points_xyz.shape[0], xyz.shape[0]
+        chord = np.empty(m)
+        idx = np.empty(m, dtype=np.intp)
+        for i in range(m):
+            px, py, pz = points_xyz[i, 0], points_xyz[i, 1], points_xyz[i, 2]
+            best, best_j = -2.0, 0
+            for j in range(n):
+                dot = px * xyz[j, 0] + py * xyz[j, 1] + pz * xyz[j, 2]
+                if dot > best:
+                    best, best_j = dot, j
+            dx, dy, dz = px - xyz[best_j, 0], py - xyz[best_j, 1], pz - xyz[best_j, 2]
+            chord[i] = np.sqrt(dx * dx + dy * dy + dz * dz)
+            idx[i] = best_j
+        return chord, idx
+
+    @njit(cache=True, fastmath=True, nogil=True)
+    def _segment_nearest_kernel(points_xyz, rows, row_offsets, xyz, offsets):
+        """
+        Exhaustive search of many small point sets in one call. Segment `s` pairs the query rows
+        `rows[row_offsets[s]:row_offsets[s + 1]]` with the indexed points `xyz[offsets[s]:offsets[s + 1]]`.
+        :param points_xyz: Unit-sphere Cartesian query points, shape (m, 3).
+        :param rows: Row positions into `points_xyz`, grouped by segment.
+        :param row_offsets: Segment boundaries in `rows`, shape (segments + 1,).
+        :param xyz: Unit-sphere Cartesian indexed points of all segments, concatenated, shape (n, 3).
+        :param offsets: Segment boundaries in `xyz`, shape (segments + 1,).
+        :return: Chord distances and indices into `xyz`, both aligned with `rows`.
+        """
+        chord = np.empty(rows.shape[0])
+        idx = np.empty(rows.shape[0], dtype=np.intp)
+        for s in range(offsets.shape[0] - 1):
+            lo, hi = offsets[s], offsets[s + 1]
+            for k in range(row_offsets[s], row_offsets[s + 1]):
+                r = rows[k]
+                px, py, pz = points_xyz[r, 0], points_xyz[r, 1], points_xyz[r, 2]
+                best, best_j = -2.0, lo
+                for j in range(lo, hi):
+                    dot = px * xyz[j, 0] + py * xyz[j, 1] + pz * xyz[j, 2]
+                    if dot > best:
+                        best, best_j = dot, j
+                dx, dy, dz = px - xyz[best_j, 0], py - xyz[best_j, 1], pz - xyz[best_j, 2]
+                chord[k] = np.sqrt(dx * dx + dy * dy + dz * dz)
+                idx[k] = best_j
+        return chord, idx
+else:
+    _nearest_kernel = None
+    _segment_nearest_kernel = None
+
+
+class _BruteForceIndex:
+    """
+    Exhaustive nearest-neighbor search over a small point set on the unit sphere, exposing `cKDTree`'s `query`
+    interface. The nearest point has the largest dot product with the query point.
+    """
+    __slots__ = ("_xyz",)
+
+    def __init__(self, xyz: np.ndarray):
+        """
+        :param xyz: Unit-sphere Cartesian coordinates, shape (n, 3).
+        """
+        self._xyz = xyz
+
+    @property
+    def xyz(self) -> np.ndarray:
+        """
+        Unit-sphere Cartesian coordinates of the indexed points, shape (n, 3).
+        """
+        return self._xyz
+
+    def query(self, points_xyz: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the nearest indexed point for each query point.
+        :param points_xyz: Unit-sphere Cartesian query points, shape (m, 3).
+        :param k: Number of neighbors; only 1 is supported.
+        :return: Chord distances and indices, both of shape (m,).
+        """
+        if k != 1:
+            raise ValueError("_BruteForceIndex only supports k=1")
+        if _nearest_kernel is not None:
+            return _nearest_kernel(np.ascontiguousarray(points_xyz), self._xyz)
+
+        idx = np.empty(len(points_xyz), dtype=np.intp)
+        step = max(1, _BRUTE_FORCE_BLOCK // len(self._xyz))
+        for start in range(0, len(points_xyz), step):
+            idx[start:start + step] = (points_xyz[start:start + step] @ self._xyz.T).argmax(axis=1)
+
+        # Chords are taken from the difference vectors, which stay accurate for nearby points
+        return np.linalg.norm(points_xyz - self._xyz[idx], axis=1), idx
+
 
 def _validate_coords(coords: tuple[float, float] | None) -> bool:
     """
@@ -40,30 +203,106 @@ def _validate_coords(coords: tuple[float, float] | None) -> bool:
     if coords is None:
         return False
     lat, lon = coords
-    return not (lat is None or lon is None or np.isnan(lat) or np.isnan(lon))
+    return not (lat is None or lon is None) and bool(np.isfinite(lat) and np.isfinite(lon))
+
+
+def _default_leaf_size(n: int) -> int:
+    """
+    Picks a leaf size for a tree over `n` points: a quarter of the point count, clamped to
+    [`_MIN_LEAF_SIZE`, `_MAX_LEAF_SIZE`]. Larger leaves mean fewer nodes, so per-city trees that only answer a
+    handful of queries are cheaper to build and to pickle, while large trees keep query times flat.
+    :param n: Number of points in the tree.
+    :return: Leaf size.
+    """
+    return max(_MIN_LEAF_SIZE, min(_MAX_LEAF_SIZE, n // 4))
 
 
-def build_balltree(coords_list: ArrayLike) -> tuple[BallTree, np.ndarray]:
+def build_balltree(coords_list: ArrayLike, leaf_size: int = None) -> tuple[cKDTree | _BruteForceIndex, np.ndarray]:
     """
-    Builds a BallTree for fast nearest-neighbor queries from a list of [lat, lon] pairs.
-    Returns the BallTree (coordinates in radians) and the original coordinates array in degrees.
+    Builds a k-d tree for fast nearest-neighbor queries from a list of [lat, lon] pairs.
+    Returns the tree (over unit-sphere Cartesian coordinates) and the original coordinates array in degrees.
+    Fewer than `_BRUTE_FORCE_MAX_POINTS` points get a `_BruteForceIndex` instead of a tree.
     :param coords_list: List of [lat, lon] pairs.
-    :return: BallTree (coordinates in radians) and the original coordinates array in degrees.
+    :param leaf_size: Leaf size of the tree; defaults to `_default_leaf_size` of the point count.
+    :return: Tree (over unit-sphere Cartesian coordinates) and the original coordinates array in degrees.
     """
-    coords = np.array(coords_list, dtype=float)
-    tree = BallTree(np.radians(coords), metric="haversine")
+    coords = np.asarray(coords_list, dtype=float)
+    xyz = _to_unit_xyz(coords)
+    if len(coords) < _BRUTE_FORCE_MAX_POINTS:
+        return _BruteForceIndex(xyz), coords
+    tree = cKDTree(xyz, leafsize=leaf_size or _default_leaf_size(len(coords)))
     return tree, coords
 
 
 def query_balltree(tree, point) -> tuple[float, None] | tuple[float, int]:
     """
-    Queries a BallTree for a point and returns the coordinates in degrees.
-    :param tree: BallTree (coordinates in radians) and the original coordinates array in degrees.
-    :param point: Point to query.
-    :return: Coordinates in degrees.
+    Queries a tree for a point and returns the distance to, and index of, the nearest point.
+    :param tree: Tree returned by `build_balltree`, or None.
+    :param point: [lat, lon] point to query, in degrees.
+    :return: Distance in miles and index of the nearest point.
     """
     if tree is None:
         return np.nan, None
 
-    dist, idx = tree.query(np.radians([point]), k=1)
-    return float(dist[0][0] * PROPERTY["EARTH_RADIUS_MILES"]), int(idx[0][0])
+    chord, idx = tree.query(_to_unit_xyz(np.array([point], dtype=float)), k=1)
+    return float(_chord_to_miles(chord)[0]), int(idx[0])
+
+
+def query_balltree_batch(tree, points: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Queries a tree for many points at once.
+    :param tree: Tree returned by `build_balltree`, or None.
+    :param points: Array-like of [lat, lon] pairs in degrees, shape (n, 2).
+    :return: Distances in miles and indices of the nearest points, both of shape (n,). If the tree is None the
+        distances are NaN and the indices are -1.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if tree is None or len(points) == 0:
+        n = len(points)
+        return np.full(n, np.nan), np.full(n, -1, dtype=np.int64)
+
+    return query_unit_batch(tree, _to_unit_xyz(points))
+
+
+def query_unit_batch(tree, points_xyz: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Queries a tree for many points that are already on the unit sphere.
+    :param tree: Tree returned by `build_balltree`, or None.
+    :param points_xyz: Unit-sphere Cartesian points from `_to_unit_xyz`, shape (n, 3).
+    :return: Distances in miles and indices of the nearest points, both of shape (n,). If the tree is None the
+        distances are NaN and the indices are -1.
+    """
+    if tree is None or len(points_xyz) == 0:
+        n = len(points_xyz)
+        return np.full(n, np.nan), np.full(n, -1, dtype=np.int64)
+
+    chord, idx = tree.query(points_xyz, k=1)
+    return _chord_to_miles(chord), idx
+
+
+def query_segments(points_xyz: np.ndarray, rows: np.ndarray, row_offsets: np.ndarray,
+                   xyz: np.ndarray, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Queries many small point sets, packed into one array, in a single call. Segment `s` answers the query rows
+    `rows[row_offsets[s]:row_offsets[s + 1]]` from the points `xyz[offsets[s]:offsets[s + 1]]`.
+    :param points_xyz: Unit-sphere Cartesian query points from `_to_unit_xyz`, shape (m, 3).
+    :param rows: Row positions into `points_xyz`, grouped by segment.
+    :param row_offsets: Segment boundaries in `rows`, shape (segments + 1,).
+    :param xyz: Unit-sphere Cartesian points of all segments, concatenated, shape (n, 3).
+    :param offsets: Segment boundaries in `xyz`, shape (segments + 1,); every segment must be non-empty.
+    :return: Distances in miles and indices into `xyz` of the nearest points, both aligned with `rows`.
+    """
+    if _segment_nearest_kernel is not None:
+        chord, idx = _segment_nearest_kernel(np.ascontiguousarray(points_xyz), rows, row_offsets,
+                                             np.ascontiguousarray(xyz), offsets)
+        return _chord_to_miles(chord), idx
+
+    chord = np.empty(len(rows))
+    idx = np.empty(len(rows), dtype=np.intp)
+    for s in range(len(offsets) - 1):
+        lo, hi = offsets[s], offsets[s + 1]
+        a, b = row_offsets[s], row_offsets[s + 1]
+        chord[a:b], idx[a:b] = _BruteForceIndex(xyz[lo:hi]).query(points_xyz[rows[a:b]])
+        idx[a:b] += lo
+    return _chord_to_miles(chord), idx
+
@@ -3,170 +3,287 @@ Nearest Neighbor Utilities for Apartments, Cities, and Landmarks
 ================================================================
 
 This module provides helper functions to efficiently compute distances between
-apartments, city centers, and landmarks using BallTree nearest-neighbor queries.
-It includes caching mechanisms to avoid rebuilding BallTrees for repeated runs
+apartments, city centers, and landmarks using k-d tree nearest-neighbor queries.
+It includes caching mechanisms to avoid rebuilding k-d trees for repeated runs
 and integrates with pandas for vectorized operations.
 
 Key Functions
 -------------
 - `_get_cache_path(cache_dir, key)`
-  Generates a safe file path for caching a BallTree, creating the directory if needed.
+  Generates a safe file path for caching a k-d tree, creating the directory (once per process) if needed.
 
 - `build_or_load_balltree(coords_list, cache_dir=None, cache_key=None)`
-  Builds a BallTree from coordinates or loads it from a cached file if available.
+  Builds a k-d tree from coordinates or loads it from a cached file if available.
+  Cache files are keyed by a digest of the coordinates, so a changed point set is
+  never answered by a stale tree. Writing a new tree for a key removes the files of
+  its superseded point sets, and files are written atomically.
 
 - `_compute_city_tree(city_centers, cache_dir)`
-  Filters valid city coordinates and returns a BallTree for city centers and the set of valid keys.
+  Filters valid city coordinates and returns a k-d tree for city centers and the set of valid keys.
 
 - `_compute_landmark_trees(landmarks_by_city, cache_dir)`
-  Filters valid landmark coordinates for each city and returns a dict of BallTrees and their coordinate arrays/names.
+  Filters valid landmark coordinates for each city and returns a dict of k-d trees, their coordinate arrays and
+  name codes, and the table of distinct landmark names the codes index into.
 
 - `append_apartments_with_nearest(df, city_centers, landmarks_by_city, cache_dir=None)`
   Adds nearest city center and landmark distances (in miles) to a DataFrame of apartments.
-  Returns a new DataFrame with additional columns:
+  The columns are added to `df` in place (no copy of the frame is made) and the same DataFrame is returned:
     - `nearest_city_center_miles`
     - `nearest_landmark_miles`
-    - `nearest_landmark_name`
+    - `nearest_landmark_name` (categorical)
 
 Notes
 -----
-- Distances are computed using haversine metric via BallTree.
-- Coordinates must be validated with `_validate_coords` before building trees.
-- Dependencies: `numpy`, `pandas`, `tqdm`, `joblib`, and the `geo.nearest` module.
-- BallTrees are cached using pickle files to `cache_dir` for performance.
+- Distances are great-circle distances; see `geo.nearest` for how the k-d trees compute them.
+- Apartments are grouped by city, so each tree is queried with one batch per city
+  rather than once per apartment. Apartment coordinates are mapped onto the unit
+  sphere once, and each city's batch is sent to the city-center tree and to its
+  landmark tree back to back in a single pass over the groups. Cities with too few
+  landmarks for a tree are packed into one array with per-city offsets and answered
+  by a single `query_segments` call instead of one query per city.
+- On multi-core machines the city groups are split across a thread pool; the tree
+  queries release the GIL and every group writes to its own rows of the outputs.
+- Landmark names are kept as integer codes into one shared table of distinct names
+  and only become a categorical column at assignment, instead of one Python string
+  reference per apartment.
+- Missing, NaN or infinite coordinates are masked out of each point set with one `np.isfinite` check before its
+  tree is built.
+- Dependencies: `numpy`, `pandas`, `tqdm`, and the `geo.nearest` module.
+- k-d trees over at least `_MIN_CACHED_POINTS` points are cached using pickle files
+  to `cache_dir` for performance; smaller trees are cheaper to rebuild than to load.
 """
 import os
 import re
+import glob
+import pickle
+import hashlib
+import functools
+from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import joblib
 from tqdm import tqdm
 import pandas as pd
-from utils.geo.nearest import _validate_coords, build_balltree, query_balltree
+from utils.geo.nearest import _BruteForceIndex, _to_unit_xyz, build_balltree, query_segments, query_unit_batch
+
+# Characters replaced by underscores when a cache key is turned into a file name
+_UNSAFE_KEY_CHARS = re.compile(r"[^\w\-]")
+
+# Hex digits in the coordinate digest that is part of every cache file name
+_DIGEST_SIZE = 8
+
+# Smaller point sets are rebuilt on every run: building their tree is faster than unpickling a cached one
+_MIN_CACHED_POINTS = 2048
+
+# Upper bound on the threads querying city groups in parallel, and the fewest groups worth splitting across them
+_MAX_QUERY_WORKERS = 8
+_MIN_PARALLEL_GROUPS = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _ensure_cache_dir(cache_dir: str) -> None:
+    """
+    Creates the cache directory if it does not exist. Memoized, so the directory is only checked once per process.
+    :param cache_dir: Directory to cache k-d tree data for.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
 
 
 def _get_cache_path(cache_dir: str, key: str) -> str:
     """
-    Generates a safe file path for caching a BallTree. Creates the directory if it does not exist.
+    Generates a safe file path for caching a k-d tree. Creates the directory if it does not exist.
     Replaces invalid characters in the key with underscores.
-    :param cache_dir: Directory to cache BallTree data for.
+    :param cache_dir: Directory to cache k-d tree data for.
     :param key: str | None by default.
-    :return: Path to the cached BallTree file.
+    :return: Path to the cached k-d tree file.
     """
-    os.makedirs(cache_dir, exist_ok=True)
-    safe_key = re.sub(r"[^\w\-]", "_", key)
-    return os.path.join(cache_dir, f"{safe_key}_tree.pkl")
+    _ensure_cache_dir(cache_dir)
+    safe_key = _UNSAFE_KEY_CHARS.sub("_", key)
+    return os.path.join(cache_dir, f"{safe_key}_kdtree.pkl")
+
+
+def _evict_stale_trees(cache_dir: str, cache_key: str, keep: str) -> None:
+    """
+    Removes cached trees of `cache_key` built from point sets other than the current one.
+    :param cache_dir: Directory to cache k-d tree data for.
+    :param cache_key: Cache key whose superseded trees are removed.
+    :param keep: Path of the current tree's cache file.
+    """
+    prefix = glob.escape(os.path.join(cache_dir, _UNSAFE_KEY_CHARS.sub("_", cache_key)))
+    for path in glob.glob(f"{prefix}_{'[0-9a-f]' * (2 * _DIGEST_SIZE)}_kdtree.pkl"):
+        if path != keep:
+            with suppress(FileNotFoundError):
+                os.remove(path)
 
 
 def build_or_load_balltree(coords_list: list, cache_dir: str = None, cache_key: str = None):
     """
-    Build a BallTree for the given coordinates or load it from cache.
+    Build a k-d tree for the given coordinates or load it from cache.
+    Only point sets of at least `_MIN_CACHED_POINTS` are cached; smaller trees are always rebuilt.
     Returns: tree, np.array of coordinates
     """
-    coords = np.array(coords_list, dtype=float)
+    coords = np.asarray(coords_list, dtype=float)
     path = None
 
-    if cache_dir and cache_key:
-        path = _get_cache_path(cache_dir, cache_key)
-        if os.path.exists(path):
-            tree = joblib.load(path)
-            return tree, coords
+    if cache_dir and cache_key and len(coords) >= _MIN_CACHED_POINTS:
+        digest = hashlib.blake2b(coords.tobytes(), digest_size=_DIGEST_SIZE).hexdigest()
+        path = _get_cache_path(cache_dir, f"{cache_key}_{digest}")
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f), coords
+        except FileNotFoundError:
+            pass
 
     tree, coords_array = build_balltree(coords)
 
     if path:
-        joblib.dump(tree, path)
+        # Written under a temporary name and renamed, so concurrent runs never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        _evict_stale_trees(cache_dir, cache_key, path)
 
     return tree, coords_array
 
 
+def _nan_if_none(value):
+    """
+    Maps a missing coordinate to NaN so it can be stored in a float array.
+    :param value: Coordinate value or None.
+    :return: The value, or NaN if it is None.
+    """
+    return np.nan if value is None else value
+
+
 def _compute_city_tree(city_centers, cache_dir):
     """
-    Filters city centers to keep only valid coordinates and builds or loads a BallTree for nearest-neighbor queries.
-    Returns the BallTree and a set of city keys with valid coordinates.
+    Filters city centers to keep only valid coordinates and builds or loads a k-d tree for nearest-neighbor queries.
+    Returns the k-d tree and a set of city keys with valid coordinates.
     :param city_centers: DataFrame of city centers.
-    :param cache_dir: Directory to cache BallTree data for.
-    :return: BallTree and a set of city keys with valid coordinates.
+    :param cache_dir: Directory to cache k-d tree data for.
+    :return: k-d tree and a set of city keys with valid coordinates.
     """
-    city_keys, city_coords = [], []
-    for key, coords in city_centers.items():
-        if coords and _validate_coords((coords['lat'], coords['lon'])):
-            city_keys.append(key)
-            city_coords.append([coords['lat'], coords['lon']])
-    tree, _ = build_or_load_balltree(city_coords, cache_dir, "city_centers") if city_coords else (None, None)
-    return tree, set(city_keys)
+    keys = list(city_centers)
+    entries = city_centers.values()
+    lat = np.fromiter((_nan_if_none(c['lat']) if c else np.nan for c in entries), dtype=float, count=len(keys))
+    lon = np.fromiter((_nan_if_none(c['lon']) if c else np.nan for c in entries), dtype=float, count=len(keys))
+    valid = np.isfinite(lat) & np.isfinite(lon)
+    if not valid.any():
+        return None, set()
+    tree, _ = build_or_load_balltree(np.column_stack((lat[valid], lon[valid])), cache_dir, "city_centers")
+    return tree, {keys[i] for i in np.flatnonzero(valid)}
 
 
 def _compute_landmark_trees(landmarks_by_city, cache_dir):
     """
-    Filters landmarks by city to include only valid coordinates, builds or loads a BallTree for each city, and returns
-    dictionaries mapping city keys to BallTrees and to coordinate/name data for valid landmarks.
+    Filters landmarks by city to include only valid coordinates, builds or loads a k-d tree for each city, and returns
+    dictionaries mapping city keys to k-d trees and to coordinate/name data for valid landmarks.
+    Names are stored as int32 codes into a table of distinct names shared by all cities; unnamed landmarks get -1.
     :param landmarks_by_city: DataFrame of landmarks by city.
-    :param cache_dir: Directory to cache BallTree data for.
-    :return: BallTree and a set of city keys with valid coordinates.
+    :param cache_dir: Directory to cache k-d tree data for.
+    :return: Dictionary of k-d trees, dictionary of (coordinates array, name codes) pairs, and the name table.
     """
     landmark_trees, landmark_coords = {}, {}
+    name_ids = {}
     for city_key, lms in landmarks_by_city.items():
-        valid_coords, valid_names = [], []
-        for lm in lms:
-            lat, lon = lm.get('lat'), lm.get('lon')
-            if _validate_coords((lat, lon)):
-                valid_coords.append([lat, lon])
-                valid_names.append(lm.get('name'))
-        if valid_coords:
-            tree, coords_array = build_or_load_balltree(valid_coords, cache_dir, city_key)
+        lat = np.fromiter((_nan_if_none(lm.get('lat')) for lm in lms), dtype=float, count=len(lms))
+        lon = np.fromiter((_nan_if_none(lm.get('lon')) for lm in lms), dtype=float, count=len(lms))
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        if valid.any():
+            names = (lms[i].get('name') for i in np.flatnonzero(valid))
+            name_codes = np.fromiter((-1 if name is None else name_ids.setdefault(name, len(name_ids))
+                                      for name in names), dtype=np.int32)
+            tree, coords_array = build_or_load_balltree(
+                np.column_stack((lat[valid], lon[valid])), cache_dir, city_key)
             landmark_trees[city_key] = tree
-            landmark_coords[city_key] = (coords_array, valid_names)
+            landmark_coords[city_key] = (coords_array, name_codes)
         else:
             landmark_trees[city_key] = None
             landmark_coords[city_key] = (None, None)
-    return landmark_trees, landmark_coords
+    return landmark_trees, landmark_coords, list(name_ids)
 
 
 def append_apartments_with_nearest(df: pd.DataFrame, city_centers: dict, landmarks_by_city: dict, cache_dir: str = None) -> pd.DataFrame:
     """
     Computes nearest city center and landmark distances for each apartment in the DataFrame.
-    Returns a new DataFrame with additional columns: nearest_city_center_miles, nearest_landmark_miles, nearest_landmark_name.
+    Mutates `df` by adding the columns nearest_city_center_miles, nearest_landmark_miles and nearest_landmark_name
+    (overwriting them if present); existing columns are left untouched and the frame is not copied.
     :param df: DataFrame containing apartment coordinates.
     :param city_centers: Dictionary of city centers.
     :param landmarks_by_city: Dictionary of landmark coordinates.
-    :param cache_dir: Directory to cache BallTree data for.
-    :return: New DataFrame with additional columns:
+    :param cache_dir: Directory to cache k-d tree data for.
+    :return: The same DataFrame with the additional columns:
         - `nearest_city_center_miles`
         - `nearest_landmark_miles`
         - `nearest_landmark_name`
     """
-    df = df.copy()
     city_tree, city_keys = _compute_city_tree(city_centers, cache_dir)
-    landmark_trees, landmark_coords = _compute_landmark_trees(landmarks_by_city, cache_dir)
+    landmark_trees, landmark_coords, landmark_name_table = _compute_landmark_trees(landmarks_by_city, cache_dir)
+
+    n = len(df)
+    # Converted to unit-sphere coordinates once and shared by the city-center and landmark queries
+    points = _to_unit_xyz(df[['latitude', 'longitude']].to_numpy(dtype=float))
+    # Preallocated outputs, filled by row position; float32 is ample for distances in miles
+    city_dists = np.full(n, np.nan, dtype=np.float32)
+    landmark_dists = np.full(n, np.nan, dtype=np.float32)
+    # Codes into `landmark_name_table`; -1 marks a missing name
+    landmark_name_codes = np.full(n, -1, dtype=np.int32)
+
+    # Row positions of every city's apartments, keyed by "City, State" built in one vectorized concat;
+    # each tree is queried once per city instead of once per row
+    row_keys = df['cityname'].astype(str) + ', ' + df['state'].astype(str)
+    groups = row_keys.groupby(row_keys, sort=False).indices
 
-    city_dists, landmark_dists, landmark_names = [], [], []
+    # Cities that can be answered by each tree; groups matching neither are skipped and keep the NaN/-1 defaults
+    if city_tree is None:
+        city_keys = set()
+    landmark_keys = {key for key, tree in landmark_trees.items() if tree is not None}
+    # Cities whose few landmarks are searched exhaustively; they are packed and answered in one fused call below
+    packed_keys = {key for key in landmark_keys if isinstance(landmark_trees[key], _BruteForceIndex)}
+
+    def query_groups(chunk, progress):
+        for city_key, rows in chunk:
+            batch = points[rows]
+
+            # --- City Center Distance ---
+            if city_key in city_keys:
+                city_dists[rows], _ = query_unit_batch(city_tree, batch)
+
+            # --- Landmark Distance ---
+            if city_key in landmark_keys and city_key not in packed_keys:
+                lm_name_codes = landmark_coords[city_key][1]
+                dists, idx = query_unit_batch(landmark_trees[city_key], batch)
+                landmark_dists[rows] = dists
+                landmark_name_codes[rows] = lm_name_codes[idx]
+            progress.update()
 
     print("Computing nearest distances for apartments...")
-    for row in tqdm(df.itertuples(index=False), total=len(df), desc="Nearest distances", colour="green"):
-        apt_lat, apt_lon = row.latitude, row.longitude
-        city_key = f"{row.cityname}, {row.state}"
-
-        # --- City Center Distance ---
-        if city_tree and city_key in city_keys:
-            dist_city, _ = query_balltree(city_tree, [apt_lat, apt_lon])
-            city_dists.append(dist_city)
+    items = [(key, rows) for key, rows in groups.items() if key in city_keys or key in landmark_keys]
+    workers = min(_MAX_QUERY_WORKERS, os.cpu_count() or 1)
+    with tqdm(total=len(items), desc="Nearest distances", colour="green") as progress:
+        if workers > 1 and len(items) >= _MIN_PARALLEL_GROUPS:
+            # Groups never share rows, so workers fill disjoint slices of the output arrays
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(query_groups, [items[i::workers] for i in range(workers)], [progress] * workers))
         else:
-            city_dists.append(np.nan)
-
-        # --- Landmark Distance ---
-        lm_tree = landmark_trees.get(city_key)
-        lm_coords_array, lm_names = landmark_coords.get(city_key) or (None, None)
-        if lm_tree is not None and lm_coords_array is not None and len(lm_coords_array) > 0:
-            dist_landmark, idx2 = query_balltree(lm_tree, [apt_lat, apt_lon])
-            landmark_dists.append(dist_landmark)
-            landmark_names.append(lm_names[idx2] if lm_names else None)
-        else:
-            landmark_dists.append(np.nan)
-            landmark_names.append(None)
+            query_groups(items, progress)
+
+    # Small landmark sets, concatenated with per-city offsets, are queried in a single exhaustive-search call
+    packed = [(key, rows) for key, rows in items if key in packed_keys]
+    if packed:
+        rows = np.concatenate([rows for _, rows in packed])
+        row_offsets = np.cumsum([0] + [len(rows) for _, rows in packed])
+        xyz = np.concatenate([landmark_trees[key].xyz for key, _ in packed])
+        offsets = np.cumsum([0] + [len(landmark_trees[key].xyz) for key, _ in packed])
+        name_codes = np.concatenate([landmark_coords[key][1] for key, _ in packed])
+        dists, idx = query_segments(points, rows, row_offsets, xyz, offsets)
+        landmark_dists[rows] = dists
+        landmark_name_codes[rows] = name_codes[idx]
 
-    # Assign results to DataFrame
+    # Write the result arrays straight into the frame; only names that are some apartment's nearest landmark
+    # are kept as categories
     df['nearest_city_center_miles'] = city_dists
     df['nearest_landmark_miles'] = landmark_dists
-    df['nearest_landmark_name'] = landmark_names
-
+    df['nearest_landmark_name'] = pd.Categorical.from_codes(
+        landmark_name_codes, categories=landmark_name_table).remove_unused_categories()
     return df
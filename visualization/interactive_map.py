@@ -2,16 +2,42 @@
 Provides the InteractiveMapBuilder class for creating interactive Folium maps of apartment/listing data.
 Maps include city center markers, landmark markers, price heatmaps, and listing density heatmaps.
 Supports layer control toggling and saving the map to an HTML file.
+Heatmap layers are built from at most `max_points` randomly sampled rows (see `build_map`), since the map's size and
+build time grow linearly with the number of points while a heatmap gains nothing visible beyond a few tens of thousands.
 
 Classes:
 - InteractiveMapBuilder(city_centers, landmarks, df): Builds and saves interactive maps with multiple layers.
 """
 import folium
-from folium.plugins import HeatMap
+from folium.plugins import FastMarkerCluster, HeatMap
 from utils.devtools.multithread_logger import AsyncFileLogger
-from tqdm import tqdm
 log = AsyncFileLogger()
 
+# Default upper bound on the points fed to each heatmap layer
+_MAX_HEATMAP_POINTS = 50_000
+
+# Client-side marker factory for FastMarkerCluster rows of [lat, lon, popup text]; formatted with (icon, color)
+_MARKER_CALLBACK = """
+var callback = function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.setIcon(L.AwesomeMarkers.icon({icon: "%s", prefix: "glyphicon", markerColor: "%s"}));
+    marker.bindPopup(document.createTextNode(row[2]));
+    return marker;
+};"""
+
+
+def _heatmap_data(frame, max_points):
+    """
+    Converts heatmap rows to the nested lists Folium serializes, sampling down to `max_points` rows first.
+    Plain lists are used on purpose: Folium validates every row in Python, which is slower on NumPy scalars.
+    :param frame: DataFrame of [latitude, longitude(, weight)] rows without missing values.
+    :param max_points: Maximum number of rows to keep, or None to keep all of them.
+    :return: List of rows.
+    """
+    if max_points is not None and len(frame) > max_points:
+        frame = frame.sample(n=max_points, random_state=0)
+    return frame.to_numpy().tolist()
+
 
 class InteractiveMapBuilder:
 
@@ -29,10 +55,15 @@ class InteractiveMapBuilder:
         self.map = None
         log.info("InteractiveMapBuilder initialized with data.")
 
-    def build_map(self):
+    def build_map(self, max_points: int | None = _MAX_HEATMAP_POINTS, markers: bool = False):
         """
         Builds an interactive Folium map with multiple layers: city center markers, landmark markers, price heatmap,
         and listing density heatmap. Adds a layer control menu and stores the map in self.map
+        The marker layers are clustered and created in the browser from one data array per layer, rather than as one
+        Folium `Marker` object per point; they are off by default.
+        :param max_points: Maximum number of listings drawn by each heatmap layer; larger datasets are sampled
+            (reproducibly). None draws every listing.
+        :param markers: Whether to add the city-center and landmark marker layers.
         """
 
         # Base map centered on the US
@@ -42,50 +73,39 @@ class InteractiveMapBuilder:
 
         # Feature groups
         log.info("Creating feature groups...")
-        # city_group = folium.FeatureGroup(name="City Centers")
-        # landmark_group = folium.FeatureGroup(name="Landmarks")
         price_heatmap = folium.FeatureGroup(name="Price Heatmap")
         density_heatmap = folium.FeatureGroup(name="Listing Density Heatmap")
         log.info("Groups created.")
 
-        # # City Center Markers
-        # log.info("Building city-center markers layer...")
-        # for city_key in tqdm(self.city_centers, desc="Building city-center markers layer...", colour="green"):
-        #     log.info(f"Adding marker: {city_key}, [{self.city_centers[city_key]["lat"]}, {self.city_centers[city_key]["lon"]}]")
-        #     if city_key is None:
-        #         continue
-        #     if self.city_centers[city_key] is None:
-        #         continue
-        #     if self.city_centers[city_key]["lat"] is None or self.city_centers[city_key]["lon"] is None:
-        #         continue
-        #     folium.Marker(
-        #         location=[self.city_centers[city_key]["lat"], self.city_centers[city_key]["lon"]],
-        #         popup=city_key,
-        #         icon=folium.Icon(color="red", icon="glyphicon glyphicon-home")
-        #     ).add_to(city_group)
-        # log.info("City-center markers layer created.")
-        #
-        # # Landmark Markers
-        # log.info("Building landmark markers layer...")
-        # for city_key, items in tqdm(self.landmarks.items(), desc="Building landmark markers layer...", colour="green"):
-        #     if not items:
-        #         continue
-        #     for lm in items:
-        #         if lm["lat"] is None or lm["lon"] is None:
-        #             continue
-        #         folium.Marker(
-        #             location=[lm["lat"], lm["lon"]],
-        #             popup=lm["name"] or "Unknown Landmark",
-        #             icon=folium.Icon(color="green", icon="glyphicon glyphicon-star")
-        #         ).add_to(landmark_group)
-        # log.info("Landmark markers layer created.")
+        if markers:
+            # City Center Markers
+            log.info("Building city-center markers layer...")
+            city_rows = [
+                [coords["lat"], coords["lon"], city_key]
+                for city_key, coords in self.city_centers.items()
+                if city_key is not None and coords and coords["lat"] is not None and coords["lon"] is not None
+            ]
+            FastMarkerCluster(city_rows, callback=_MARKER_CALLBACK % ("home", "red"),
+                              name="City Centers").add_to(self.map)
+            log.info("City-center markers layer created.")
+
+            # Landmark Markers
+            log.info("Building landmark markers layer...")
+            landmark_rows = [
+                [lm["lat"], lm["lon"], lm["name"] or "Unknown Landmark"]
+                for items in self.landmarks.values() if items
+                for lm in items if lm["lat"] is not None and lm["lon"] is not None
+            ]
+            FastMarkerCluster(landmark_rows, callback=_MARKER_CALLBACK % ("star", "green"),
+                              name="Landmarks").add_to(self.map)
+            log.info("Landmark markers layer created.")
 
         # Price Heatmap
         log.info("Building price heatmap layer...")
         heat_df = self.df[['latitude', 'longitude', 'price']].dropna()
         if not heat_df.empty:
             HeatMap(
-                heat_df.values.tolist(),
+                _heatmap_data(heat_df, max_points),
                 radius=5,
                 blur=5
             ).add_to(price_heatmap)
@@ -96,7 +116,7 @@ class InteractiveMapBuilder:
         density_df = self.df[['latitude', 'longitude']].dropna()
         if not density_df.empty:
             HeatMap(
-                density_df.values.tolist(),
+                _heatmap_data(density_df, max_points),
                 radius=2,
                 blur=3
             ).add_to(density_heatmap)
@@ -104,8 +124,6 @@ class InteractiveMapBuilder:
 
         # Attach Layers
         log.info("Attaching layers...")
-        # city_group.add_to(self.map)
-        # landmark_group.add_to(self.map)
         price_heatmap.add_to(self.map)
         density_heatmap.add_to(self.map)
         log.info("Layers added.")
@@ -1,6 +1,9 @@
 """
 Provides functions for visualizing apartment data, including 2D scatter plots, 3D scatter plots,
 and correlation heatmaps. All plots are saved as SVG files in the configured figures directory.
+The scatter regression line is a single `np.polyfit` fit, without seaborn's bootstrapped confidence band.
+Scatter point clouds are rasterized into a single embedded image while axes and text stay vector, so file size and
+save time no longer grow with one SVG element per apartment.
 
 Functions:
 - scatter(df, title, xlabel, ylabel): Generates a 2D scatter plot with a regression line.
@@ -8,13 +11,45 @@ Functions:
 - heatmap(df, title): Builds a heatmap of correlations between price and distances to city centers and landmarks.
 """
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import seaborn as sns
 from Settings import ENV as PROPERTY
 from utils.devtools.multithread_logger import AsyncFileLogger
+from visualization.regression import MODEL_COLUMNS
 
 log = AsyncFileLogger()
 
 
+def _svg_path(title):
+    """
+    Builds the lower-cased SVG path of a figure in the configured figures directory.
+    The directory is read when the path is built, so a `Settings.refresh()` after import is honoured.
+    :param title: Figure title with spaces already replaced by underscores.
+    :return: Path to the SVG file.
+    """
+    return f"{PROPERTY['FIGURES_DIR']}/{title}.svg".lower()
+
+
+def _regression_line(x, y):
+    """
+    Draws the least-squares line of y on x in red across the full width of the current axes, like
+    `sns.regplot(..., scatter=False, truncate=False)` but fitted with one `np.polyfit` call and without the
+    bootstrapped confidence band.
+    :param x: x values; pairs with a missing value are ignored.
+    :param y: y values.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    if np.count_nonzero(valid) < 2:
+        return
+    slope, intercept = np.polyfit(x[valid], y[valid], 1)
+    ax = plt.gca()
+    xlim = ax.get_xlim()
+    xs = np.array(xlim)
+    ax.plot(xs, slope * xs + intercept, color='red')
+    ax.set_xlim(xlim)
+
+
 def histogram(df, column_label, title, xlabel, ylabel):
     fig, ax = plt.subplots()
     df[column_label].plot(kind="hist", bins=20, ax=ax)
@@ -36,12 +71,12 @@ def scatter(df, title, xlabel, ylabel):
     :param ylabel: Plot ylabel.
     """
     title = title.replace(' ', '_')
-    save_path = f"{PROPERTY["FIGURES_DIR"]}/{title}.svg".lower()
+    save_path = _svg_path(title)
     log.info(f"Building 2D scatter plot: {title} ...")
 
     plt.figure(figsize=(10, 6))
-    sns.scatterplot(x=xlabel, y=ylabel, data=df)
-    sns.regplot(x=xlabel, y=ylabel, data=df, scatter=False, color='red', truncate=False)
+    sns.scatterplot(x=xlabel, y=ylabel, data=df, rasterized=True)
+    _regression_line(df[xlabel].to_numpy(dtype=float), df[ylabel].to_numpy(dtype=float))
     plt.title(title)
     plt.xlabel(xlabel)
     plt.ylabel(ylabel)
@@ -49,7 +84,7 @@ def scatter(df, title, xlabel, ylabel):
     plt.tight_layout()
     log.info("2D scatter plot created successfully.")
     log.info(f"Saving 2D scatter plot to {save_path}")
-    plt.savefig(save_path)
+    plt.savefig(save_path, dpi=150)
     log.info(f"2D scatter plot saved to {save_path}")
     print(f"2D scatter plot saved to {save_path}")
     plt.close()
@@ -69,12 +104,12 @@ def plot3d(df, title, xlabel, ylabel, zlabel, xunit, yunit, zunit):
     :param zunit: Plot zunit.
     """
     title = title.replace(' ', '_')
-    save_path = f"{PROPERTY["FIGURES_DIR"]}/{title}.svg".lower()
+    save_path = _svg_path(title)
     log.info(f"Building 3D scatter plot: {title} ...")
 
     fig = plt.figure(figsize=(10, 7))
     ax = fig.add_subplot(111, projection='3d')
-    ax.scatter(df[xlabel], df[ylabel], df[zlabel], c="red", s=20, alpha=0.8)
+    ax.scatter(df[xlabel], df[ylabel], df[zlabel], c="red", s=20, alpha=0.8, rasterized=True)
     ax.set_xlabel(f"{xlabel} {xunit}")
     ax.set_ylabel(f"{ylabel} {yunit}")
     ax.set_zlabel(f"{zlabel} {zunit}")
@@ -82,8 +117,9 @@ def plot3d(df, title, xlabel, ylabel, zlabel, xunit, yunit, zunit):
     log.info("3D scatter plot created successfully.")
 
     log.info(f"Saving 3D scatter plot to {save_path} ...")
+    # dpi only affects the rasterized points
     plt.savefig(save_path, orientation='landscape', bbox_inches='tight', format="svg",
-                dpi=300)
+                dpi=150)
     log.info(f"3D relationship plot saved: {save_path}")
     plt.show()
     plt.close()
@@ -97,12 +133,17 @@ def heatmap(df, title):
     :param title: Plot title.
     """
     title = title.replace(' ', '_')
-    save_path = f"{PROPERTY["FIGURES_DIR"]}/{title}.svg".lower()
+    save_path = _svg_path(title)
     log.info(f"Building basic heatmap: {title}...")
 
+    # Rows with a missing value are dropped as a whole (as in the regression models) and the matrix is computed from
+    # one float64 array instead of pandas' pairwise column scans
+    values = df[list(MODEL_COLUMNS)].dropna().to_numpy(dtype=np.float64)
+    corr = pd.DataFrame(np.corrcoef(values, rowvar=False), index=MODEL_COLUMNS, columns=MODEL_COLUMNS)
+
     plt.figure(figsize=(10, 6))
     sns.heatmap(
-        df[['price', 'nearest_city_center_miles', 'nearest_landmark_miles']].corr(),
+        corr,
         annot=True,
         cmap='coolwarm'
     )
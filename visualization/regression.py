@@ -3,59 +3,234 @@ Provides functionality to run ordinary least squares (OLS) regression analyses o
 Includes four models examining the relationship between apartment prices and distances to city centers and landmarks.
 Each model summary is saved as a text file and printed to the console.
 
+The four models are nested, so instead of going through the patsy/statsmodels formula machinery the full design
+matrix [1, x1, x2, x1*x2] is reduced to its Gram matrix X'X and X'y in a single pass over the data. Every model is
+then solved from a sub-block of those matrices with a pseudo-inverse, and the summary statistics (standard errors,
+t-tests, R², F-test, information criteria) are derived from the same sufficient statistics. The residual diagnostics and condition number
+of statsmodels' summary are computed as well.
+
 Functions:
 - run_ols_models(df): Runs four OLS regression models on the DataFrame and saves/prints their summaries.
 """
-import statsmodels.formula.api as smf
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+from scipy import stats
 from Settings import ENV as PROPERTY
 
+# Columns used by the models; also imported by `plot_generator.heatmap` so both read the same projection
+MODEL_COLUMNS = ('price', 'nearest_city_center_miles', 'nearest_landmark_miles')
+
+# Name given to the product term of the interaction model
+_INTERACTION = 'nearest_city_center_miles:nearest_landmark_miles'
+
+# (description, predictors, output file name) for each model; price is always the response
+_MODELS = [
+    ("Price v. Distance to City Center", ['nearest_city_center_miles'], "model1_city_center.txt"),
+    ("Price v. Distance to Landmark", ['nearest_landmark_miles'], "model2_landmark.txt"),
+    ("Overlay of Both", ['nearest_city_center_miles', 'nearest_landmark_miles'], "model3_full.txt"),
+    ("Compound Effect of Both", ['nearest_city_center_miles', 'nearest_landmark_miles', _INTERACTION],
+     "model4_interaction.txt"),
+]
+
+
+def _fit(gram, xty, yty, tss, n, idx):
+    """
+    Fits an OLS model from precomputed sufficient statistics and derives the usual inference statistics.
+    The Gram sub-block is inverted with `np.linalg.pinv`, so collinear or constant predictors get the minimum-norm
+    solution (as statsmodels' pinv fit does) instead of an error, and the model degrees of freedom follow its rank.
+    Degenerate inputs (no residual degrees of freedom, constant price) give NaN/inf statistics rather than raising.
+    :param gram: Gram matrix X'X of the full design matrix.
+    :param xty: X'y of the full design matrix.
+    :param yty: y'y.
+    :param tss: Total (centered) sum of squares of y.
+    :param n: Number of observations.
+    :param idx: Indices of the design-matrix columns used by the model; the intercept (0) comes first.
+    :return: Dictionary of coefficients, standard errors, t/p-values, confidence bounds and goodness-of-fit measures.
+    """
+    k = len(idx)
+    gram_sub = gram[np.ix_(idx, idx)]
+    xty_sub = xty[idx]
+
+    gram_inv = np.linalg.pinv(gram_sub, hermitian=True)
+    beta = gram_inv @ xty_sub
+    rank = np.linalg.matrix_rank(gram_sub, hermitian=True)
+    rss = np.float64(max(yty - beta @ xty_sub, 0.0))
+    tss = np.float64(tss)
+    df_model, df_resid = rank - 1, n - rank
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma2 = rss / df_resid if df_resid > 0 else np.float64(np.nan)
+        bse = np.sqrt(np.diag(sigma2 * gram_inv))
+        tvalues = beta / bse
+        t_crit = stats.t.ppf(0.975, df_resid) if df_resid > 0 else np.nan
+
+        r2 = 1 - rss / tss
+        f_stat = ((tss - rss) / df_model) / sigma2 if df_model > 0 else np.float64(np.nan)
+        llf = -n / 2 * (np.log(2 * np.pi) + np.log(rss / n) + 1)
+        rsquared_adj = 1 - (1 - r2) * (n - 1) / df_resid if df_resid > 0 else np.float64(np.nan)
+    return {
+        "params": beta,
+        "bse": bse,
+        "tvalues": tvalues,
+        "pvalues": 2 * stats.t.sf(np.abs(tvalues), df_resid),
+        "conf_low": beta - t_crit * bse,
+        "conf_high": beta + t_crit * bse,
+        "nobs": n,
+        "df_model": df_model,
+        "df_resid": df_resid,
+        "rsquared": r2,
+        "rsquared_adj": rsquared_adj,
+        "fvalue": f_stat,
+        "f_pvalue": stats.f.sf(f_stat, df_model, df_resid),
+        "llf": llf,
+        "aic": 2 * rank - 2 * llf,
+        "bic": np.log(n) * rank - 2 * llf,
+    }
+
+
+def _diagnostics(resid, gram_sub):
+    """
+    Computes the residual and design diagnostics of statsmodels' OLS summary: the omnibus and Jarque-Bera normality
+    tests, skew, kurtosis, the Durbin-Watson statistic and the condition number of the design matrix.
+    :param resid: Residuals of the fitted model, in data order.
+    :param gram_sub: Gram matrix X'X of the model's design matrix; its eigenvalues are the squared singular values of X.
+    :return: Dictionary of diagnostics, merged into the fit before formatting.
+    """
+    n = len(resid)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skew = stats.skew(resid)
+        kurtosis = stats.kurtosis(resid, fisher=False)
+        # The omnibus test's skew component needs at least 8 observations
+        omnibus, omnibus_p = stats.normaltest(resid) if n >= 8 else (np.nan, np.nan)
+        jarque_bera = n / 6 * (skew ** 2 + (kurtosis - 3) ** 2 / 4)
+        durbin_watson = np.sum(np.diff(resid) ** 2) / (resid @ resid)
+        eigenvalues = np.linalg.eigvalsh(gram_sub)
+        condition_number = np.sqrt(eigenvalues[-1] / eigenvalues[0])
+    return {
+        "omnibus": omnibus,
+        "omnibus_p": omnibus_p,
+        "durbin_watson": durbin_watson,
+        "jarque_bera": jarque_bera,
+        "jarque_bera_p": stats.chi2.sf(jarque_bera, 2),
+        "skew": skew,
+        "kurtosis": kurtosis,
+        "condition_number": condition_number,
+        "min_eigenvalue": eigenvalues[0],
+    }
+
+
+def _summary_text(description, names, fit):
+    """
+    Formats a fitted model as a plain-text summary table in the spirit of statsmodels' OLS summary.
+    :param description: Human-readable model description.
+    :param names: Coefficient names, intercept first.
+    :param fit: Dictionary returned by `_fit`.
+    :return: Summary text.
+    """
+    width = max(78, max(len(name) for name in names) + 64)
+    rule, thin = "=" * width, "-" * width
+    half = width // 2
+    rows = [
+        ("Dep. Variable:", "price", "R-squared:", f"{fit['rsquared']:.3f}"),
+        ("Model:", "OLS", "Adj. R-squared:", f"{fit['rsquared_adj']:.3f}"),
+        ("Method:", "Least Squares", "F-statistic:", f"{fit['fvalue']:.4g}"),
+        ("No. Observations:", f"{fit['nobs']}", "Prob (F-statistic):", f"{fit['f_pvalue']:.3g}"),
+        ("Df Residuals:", f"{fit['df_resid']}", "Log-Likelihood:", f"{fit['llf']:.5g}"),
+        ("Df Model:", f"{fit['df_model']}", "AIC:", f"{fit['aic']:.4g}"),
+        ("Covariance Type:", "nonrobust", "BIC:", f"{fit['bic']:.4g}"),
+    ]
+    lines = ["OLS Regression Results".center(width), f"Model: {description}".center(width), rule]
+    for left_label, left_value, right_label, right_value in rows:
+        left = f"{left_label:<20}{left_value:>{half - 22}}"
+        lines.append(f"{left}  {right_label:<20}{right_value:>{width - half - 20}}")
+    lines.append(rule)
+
+    name_width = width - 60
+    lines.append(f"{'':<{name_width}}{'coef':>10}{'std err':>10}{'t':>10}{'P>|t|':>10}{'[0.025':>10}{'0.975]':>10}")
+    lines.append(thin)
+    for i, name in enumerate(names):
+        lines.append(
+            f"{name:<{name_width}}{fit['params'][i]:>10.4f}{fit['bse'][i]:>10.3f}{fit['tvalues'][i]:>10.3f}"
+            f"{fit['pvalues'][i]:>10.3f}{fit['conf_low'][i]:>10.3f}{fit['conf_high'][i]:>10.3f}"
+        )
+    lines.append(rule)
+
+    rows = [
+        ("Omnibus:", f"{fit['omnibus']:#.3f}", "Durbin-Watson:", f"{fit['durbin_watson']:#.3f}"),
+        ("Prob(Omnibus):", f"{fit['omnibus_p']:#.3f}", "Jarque-Bera (JB):", f"{fit['jarque_bera']:#.3f}"),
+        ("Skew:", f"{fit['skew']:#.3f}", "Prob(JB):", f"{fit['jarque_bera_p']:#.3g}"),
+        ("Kurtosis:", f"{fit['kurtosis']:#.3f}", "Cond. No.", f"{fit['condition_number']:#.3g}"),
+    ]
+    for left_label, left_value, right_label, right_value in rows:
+        left = f"{left_label:<20}{left_value:>{half - 22}}"
+        lines.append(f"{left}  {right_label:<20}{right_value:>{width - half - 20}}")
+    lines.append(rule)
+
+    # Same notes and multicollinearity warnings as statsmodels
+    lines += ["", "Notes:", "[1] Standard Errors assume that the covariance matrix of the errors is correctly specified."]
+    if fit['min_eigenvalue'] < 1e-10:
+        lines.append(f"[2] The smallest eigenvalue is {fit['min_eigenvalue']:6.3g}. This might indicate that there are\n"
+                     "strong multicollinearity problems or that the design matrix is singular.")
+    elif fit['condition_number'] > 1000:
+        lines.append(f"[2] The condition number is large, {fit['condition_number']:6.3g}. This might indicate that there are\n"
+                     "strong multicollinearity or other numerical problems.")
+    return "\n".join(lines)
+
+
+def _dump(summary, out_path):
+    """
+    Writes a model summary to disk and reports the saved path.
+    :param summary: Summary text.
+    :param out_path: Path to the output text file.
+    """
+    Path(out_path).write_text(summary)
+    print(f"Regression model saved: {out_path}")
+
 
 def run_ols_models(df):
     """
     Runs four ordinary least squares (OLS) regression models on the DataFrame to analyze the relationship between
     apartment prices and distances to city centers and landmarks.
 
+    The three model columns are projected out of the DataFrame once, downcast to float32 and stripped of missing
+    values. X'X and X'y of the full interaction design matrix are accumulated once (in float64), and each model is
+    solved from the sub-block belonging to its predictors; only the residual diagnostics (omnibus, Jarque-Bera,
+    Durbin-Watson) take one more pass over the data per model. Summary files are written on a background thread while
+    the next model is solved; each summary is formatted once and reused for printing.
+
     Saves each model summary as a text file in the configured models directory and prints the summaries to the console.
     :param df: DataFrame of apartment prices and distances to city centers and landmarks.
     """
-    # Model 1: Price v. Distance to City Center
-    print("Building regression models...(1/4)")
-    model1 = smf.ols('price ~ nearest_city_center_miles', data=df).fit()
-    print("Saving regression model 1...")
-    with open(f"{PROPERTY["FIGURES_DIR"]}/model1_city_center.txt", "w") as f:
-        f.write(model1.summary().as_text())
-    print(f"Regression model 1 saved: {PROPERTY["FIGURES_DIR"]}/model1_city_center.txt")
-    print()
+    data = df[list(MODEL_COLUMNS)].astype(np.float32).dropna()
+    y = data['price'].to_numpy(dtype=np.float64)
+    x1 = data['nearest_city_center_miles'].to_numpy(dtype=np.float64)
+    x2 = data['nearest_landmark_miles'].to_numpy(dtype=np.float64)
 
-    # Model 2: Price v. Distance to Landmark
-    print("Building regression models...(2/4)")
-    model2 = smf.ols('price ~ nearest_landmark_miles', data=df).fit()
-    print("Saving regression model 2...")
-    with open(f"{PROPERTY["FIGURES_DIR"]}/model2_landmark.txt", "w") as f:
-        f.write(model2.summary().as_text())
-    print(f"Regression model 2 saved: {PROPERTY["FIGURES_DIR"]}/model2_landmark.txt")
-    print()
+    # One pass over the data: sufficient statistics of the full design matrix
+    names = ['Intercept', 'nearest_city_center_miles', 'nearest_landmark_miles', _INTERACTION]
+    X = np.column_stack([np.ones(len(y)), x1, x2, x1 * x2])
+    gram, xty, yty = X.T @ X, X.T @ y, float(y @ y)
+    n = len(y)
+    tss = yty - n * y.mean() ** 2
 
-    # Model 3: Overlay of Both
-    print("Building regression models...(3/4)")
-    model3 = smf.ols('price ~ nearest_city_center_miles + nearest_landmark_miles', data=df).fit()
-    print("Saving regression model 3...")
-    with open(f"{PROPERTY["FIGURES_DIR"]}/model3_full.txt", "w") as f:
-        f.write(model3.summary().as_text())
-    print(f"Regression model 3 saved: {PROPERTY["FIGURES_DIR"]}/model3_full.txt")
-    print()
+    summaries, writes = [], []
+    out_dir = PROPERTY["FIGURES_DIR"]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for i, (description, predictors, filename) in enumerate(_MODELS, start=1):
+            print(f"Building regression models...({i}/{len(_MODELS)})")
+            idx = [0] + [names.index(name) for name in predictors]
+            fit = _fit(gram, xty, yty, tss, n, idx)
+            fit.update(_diagnostics(y - X[:, idx] @ fit['params'], gram[np.ix_(idx, idx)]))
+            summary = _summary_text(description, ['Intercept'] + predictors, fit)
+            writes.append(pool.submit(_dump, summary, f"{out_dir}/{filename}"))
+            summaries.append(summary)
 
-    # Model 4: Compound Effect of Both
-    print("Building regression models...(4/4)")
-    model4 = smf.ols('price ~ nearest_city_center_miles * nearest_landmark_miles', data=df).fit()
-    print("Saving regression model 4...")
-    with open(f"{PROPERTY["FIGURES_DIR"]}/model4_interaction.txt", "w") as f:
-        f.write(model4.summary().as_text())
-    print(f"Regression model 4 saved: {PROPERTY["FIGURES_DIR"]}/model4_interaction.txt")
+    # Surface any failed write
+    for write in writes:
+        write.result()
     print()
 
     # Print models
-    print(model1.summary())
-    print(model2.summary())
-    print(model3.summary())
-    print(model4.summary())
\ No newline at end of file
+    for summary in summaries:
+        print(summary)